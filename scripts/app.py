@@ -1,550 +1,1008 @@
 # Run this app with `python app.py` and
 # visit http://127.0.0.1:8050/ in your web browser.
+# Set TED_TALKS_WATCH to the data file, or to a drop directory, to show new
+# talks as they are appended.
+
+import os
+import secrets
 
-import datetime as dt
 import dash_bootstrap_components as dbc
 import numpy as np
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
-from dash import Dash, dcc, html, Input, Output
-from plotly.subplots import make_subplots
+from dash import Dash, callback, dcc, html, no_update, Input, Output, State
+from dash.exceptions import PreventUpdate
+from cache import FigureCache
+from database import SQLiteTalks
+from executor import PAGE_STORE, RenderExecutor
+import export
+from figures import (
+    BASE_LAYOUT,
+    TEMPLATE,
+    density_figure,
+    like_rate_figure,
+    patch_figure,
+    percentiles_figure,
+    speakers_figure,
+    time_series_figure,
+    top_talks_figure,
+)
+from ingest import Follower
+from metrics import Metrics
+from snapshot import clean_talks, read_talks
+from store import Talks
+
+DATA_PATH = "data/ted-talks.csv"
+
+YEAR_SLIDERS = ["talks-year", "speakers-year", "time-series-year", "engagement-year"]
+
+# Time series granularities: calendar month (all years folded together),
+# quarter, year, chronological month, rolling averages and running totals
+TIME_SERIES_MODES = [
+    "month",
+    "quarter",
+    "year",
+    "year-month",
+    "3-month average",
+    "12-month average",
+    "cumulative",
+]
+ROLLING_MONTHS = {"3-month average": 3, "12-month average": 12}
+
+# Like-rate quantiles drawn per year in the engagement panel
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+EXPORT_STYLE = dict(textAlign="right", fontSize="small")
+
+# Stores recording which figures a page holds, so that updates are sent as
+# patches only to figures the page has received in full
+RENDERED_STORES = [
+    "talks-rendered",
+    "speakers-rendered",
+    "engagement-rendered",
+    "time-series-rendered",
+]
+
+# Rendered callback outputs, keyed on normalized inputs
+figure_cache = FigureCache(max_entries=256, max_bytes=32 * 2**20, shared=[TEMPLATE])
+
+# Per-callback timings served on /metrics
+metrics = Metrics()
+metrics.collect(
+    "figure_cache",
+    figure_cache.stats,
+    counters=["hits", "misses", "evictions", "invalidations"],
+)
 
-app = Dash(__name__, external_stylesheets=[dbc.themes.CYBORG])
+# Pool rendering the cached outputs on a miss, per worker process. Its threads
+# start with the first render, so a --preload master never forks them.
+renders = RenderExecutor(max_workers=4, wrap=metrics.carry)
+metrics.collect(
+    "render_executor",
+    renders.stats,
+    counters=["submitted", "coalesced", "superseded", "cancelled"],
+)
 
-# Read data
-df = pd.read_csv("data/ted-talks.csv").dropna()
-df["date"] = pd.to_datetime(df["date"])
-df = df[df["date"] >= dt.datetime(2000, 1, 1)]
-year_min = df["date"].dt.year.min()
-year_max = df["date"].dt.year.max()
+# Data backend queried by the callbacks, set by load_data()
+talks = None
+
+# The app create_app() built. The callbacks, caches and data backend are
+# module-global, so a process serves only one.
+dash_app = None
+
+
+# Open the data backend: a SQLite database built by database.py, or else a
+# CSV file read into memory with its query indexes
+def load_data(path, mmap_mode=None):
+    global talks
+
+    if path.endswith(".db"):
+        talks = SQLiteTalks(path)
+    else:
+        talks = Talks(read_talks(path, mmap_mode))
+    figure_cache.clear()
+
+
+# Whether the cached output under `key` can change when talks of the given
+# years and authors are added
+def is_stale(key, years, authors):
+    name, *args = key
+    if name == "render_talks_per_speaker_content":
+        return args[1] in authors
+    if name == "render_talk_search_content" and len(args) == 2:
+        return True
+    first, last = args[-2:]
+    # Rolling averages also read up to 11 months before the range
+    if name == "render_time_series_content" and args[0] in ROLLING_MONTHS:
+        first -= 1
+    return any(first <= year <= last for year in years)
+
+
+# Fold a batch of new talks into the data backend and drop only the cached
+# outputs they change
+def ingest(df):
+    global talks
+
+    df = talks.unseen(clean_talks(df))
+    if df.empty:
+        return
+    talks = talks.extend(df)
+    years = set(df["date"].dt.year.tolist())
+    authors = set(df["author"])
+    figure_cache.discard(lambda key: is_stale(key, years, authors))
+
+
+# Year slider marks
+def year_marks(year_min, year_max):
+    return {
+        i: {
+            "label": f"{i}",
+            "style": {
+                "transform": "rotate(-45deg)",
+                "color": "white",
+            },
+        }
+        for i in range(year_min, year_max + 1)
+    }
+
+
+# Download links for a selection
+def export_links(**selection):
+    return [
+        "Download ",
+        html.A("CSV", href=export.export_url("csv", **selection)),
+        " · ",
+        html.A("Parquet", href=export.export_url("parquet", **selection)),
+    ]
 
-# HTML webpage layout
-app.layout = html.Div(
-    [
-        html.H1(
-            "TED Talks",
-            style=dict(color="red", textShadow="rgb(127, 2, 2) 2px 2px 2px"),
-        ),
-        dbc.Card(
-            dbc.CardBody(
-                [
-                    dbc.Row(
-                        [
-                            dbc.Col(
-                                [
-                                    # Top talks
-                                    dbc.Card(
-                                        [
-                                            dbc.CardBody(
-                                                [
-                                                    html.Div(
-                                                        [
-                                                            html.Label("Top "),
-                                                            dcc.Input(
-                                                                id="talks-number",
-                                                                type="number",
-                                                                min=1,
-                                                                style=dict(
-                                                                    width="65px",
-                                                                    margin="0 5px",
+
+# HTML webpage layout, built on every page load. With `refresh_seconds`, the
+# page checks that often for years added by ingested talks.
+def create_layout(talks, refresh_seconds=None):
+    return html.Div(
+        [
+            html.H1(
+                "TED Talks",
+                style=dict(color="red", textShadow="rgb(127, 2, 2) 2px 2px 2px"),
+            ),
+            dbc.Card(
+                dbc.CardBody(
+                    [
+                        dbc.Row(
+                            [
+                                dbc.Col(
+                                    [
+                                        # Top talks
+                                        dbc.Card(
+                                            [
+                                                dbc.CardBody(
+                                                    [
+                                                        html.Div(
+                                                            [
+                                                                html.Label("Top "),
+                                                                dcc.Input(
+                                                                    id="talks-number",
+                                                                    type="number",
+                                                                    min=1,
+                                                                    style=dict(
+                                                                        width="65px",
+                                                                        margin="0 5px",
+                                                                    ),
                                                                 ),
+                                                                html.Label(" talks"),
+                                                            ]
+                                                        ),
+                                                        dcc.Graph(id="talks-content"),
+                                                        dcc.RangeSlider(
+                                                            id="talks-year",
+                                                            min=talks.year_min,
+                                                            max=talks.year_max,
+                                                            step=1,
+                                                            marks=year_marks(
+                                                                talks.year_min,
+                                                                talks.year_max,
                                                             ),
-                                                            html.Label(" talks"),
-                                                        ]
-                                                    ),
-                                                    dcc.Graph(id="talks-content"),
-                                                    dcc.RangeSlider(
-                                                        id="talks-year",
-                                                        min=year_min,
-                                                        max=year_max,
-                                                        step=1,
-                                                        marks={
-                                                            i: {
-                                                                "label": f"{i}",
-                                                                "style": {
-                                                                    "transform": "rotate(-45deg)",
-                                                                    "color": "white",
-                                                                },
-                                                            }
-                                                            for i in range(
-                                                                year_min, year_max + 1
-                                                            )
-                                                        },
-                                                        value=[year_min, year_max],
-                                                    ),
-                                                ]
-                                            )
-                                        ]
-                                    )
-                                ],
-                                width=7,
-                            ),
-                            dbc.Col(
-                                [
-                                    # Top speakers
-                                    dbc.Card(
-                                        [
-                                            dbc.CardBody(
-                                                [
-                                                    html.Div(
-                                                        [
-                                                            html.Label("Top "),
-                                                            dcc.Input(
-                                                                id="speakers-number",
-                                                                type="number",
-                                                                min=1,
-                                                                style=dict(
-                                                                    width="65px",
-                                                                    margin="0 5px",
+                                                            value=[
+                                                                talks.year_min,
+                                                                talks.year_max,
+                                                            ],
+                                                        ),
+                                                        html.Div(
+                                                            id="talks-export",
+                                                            style=EXPORT_STYLE,
+                                                        ),
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ],
+                                    width=7,
+                                ),
+                                dbc.Col(
+                                    [
+                                        # Top speakers
+                                        dbc.Card(
+                                            [
+                                                dbc.CardBody(
+                                                    [
+                                                        html.Div(
+                                                            [
+                                                                html.Label("Top "),
+                                                                dcc.Input(
+                                                                    id="speakers-number",
+                                                                    type="number",
+                                                                    min=1,
+                                                                    style=dict(
+                                                                        width="65px",
+                                                                        margin="0 5px",
+                                                                    ),
                                                                 ),
+                                                                html.Label(" speakers"),
+                                                            ]
+                                                        ),
+                                                        html.Br(),
+                                                        html.Label(
+                                                            "Bubble size indicates video counts",
+                                                            style=dict(
+                                                                margin="0 0 0 150px"
                                                             ),
-                                                            html.Label(" speakers"),
-                                                        ]
-                                                    ),
-                                                    html.Br(),
-                                                    html.Label(
-                                                        "Bubble size indicates video counts",
-                                                        style=dict(
-                                                            margin="0 0 0 150px"
                                                         ),
-                                                    ),
-                                                    dcc.Graph(
-                                                        id="speakers-content",
-                                                        style=dict(
-                                                            margin="-50px 0 0 0"
+                                                        dcc.Graph(
+                                                            id="speakers-content",
+                                                            style=dict(
+                                                                margin="-50px 0 0 0"
+                                                            ),
                                                         ),
-                                                    ),
-                                                ]
-                                            )
-                                        ]
-                                    )
-                                ],
-                                width=5,
-                            ),
-                        ]
-                    ),
-                    html.Br(),
-                    dbc.Row(
-                        [
-                            dbc.Col(
-                                [
-                                    # Time Series Analysis
-                                    dbc.Card(
-                                        [
-                                            dbc.CardBody(
-                                                [
-                                                    html.Div(
-                                                        [html.Label("TED talks per ")]
-                                                    ),
-                                                    html.Div(
-                                                        [
-                                                            dcc.Dropdown(
-                                                                id="time-series-dropdown",
-                                                                options=[
-                                                                    "month",
-                                                                    "year",
-                                                                ],
-                                                                value="month",
-                                                                clearable=False,
-                                                                style=dict(
-                                                                    color="black"
-                                                                ),
-                                                            )
-                                                        ],
-                                                        style=dict(
-                                                            width="110px",
-                                                            margin="-29px 0px 0px 100px",
+                                                        dcc.RangeSlider(
+                                                            id="speakers-year",
+                                                            min=talks.year_min,
+                                                            max=talks.year_max,
+                                                            step=1,
+                                                            marks=year_marks(
+                                                                talks.year_min,
+                                                                talks.year_max,
+                                                            ),
+                                                            value=[
+                                                                talks.year_min,
+                                                                talks.year_max,
+                                                            ],
+                                                        ),
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ],
+                                    width=5,
+                                ),
+                            ]
+                        ),
+                        html.Br(),
+                        dbc.Row(
+                            [
+                                dbc.Col(
+                                    [
+                                        # Time Series Analysis
+                                        dbc.Card(
+                                            [
+                                                dbc.CardBody(
+                                                    [
+                                                        html.Div(
+                                                            [
+                                                                html.Label(
+                                                                    "TED talks per "
+                                                                )
+                                                            ]
+                                                        ),
+                                                        html.Div(
+                                                            [
+                                                                dcc.Dropdown(
+                                                                    id="time-series-dropdown",
+                                                                    options=TIME_SERIES_MODES,
+                                                                    value="month",
+                                                                    clearable=False,
+                                                                    style=dict(
+                                                                        color="black"
+                                                                    ),
+                                                                )
+                                                            ],
+                                                            style=dict(
+                                                                width="200px",
+                                                                margin="-29px 0px 0px 100px",
+                                                            ),
+                                                        ),
+                                                        dcc.Graph(
+                                                            id="time-series-content"
                                                         ),
-                                                    ),
-                                                    dcc.Graph(id="time-series-content"),
-                                                    dcc.RangeSlider(
-                                                        id="time-series-year",
-                                                        min=year_min,
-                                                        max=year_max,
-                                                        step=1,
-                                                        marks={
-                                                            i: {
-                                                                "label": f"{i}",
-                                                                "style": {
-                                                                    "transform": "rotate(-45deg)",
-                                                                    "color": "white",
-                                                                },
-                                                            }
-                                                            for i in range(
-                                                                year_min, year_max + 1
-                                                            )
-                                                        },
-                                                        value=[year_min, year_max],
-                                                    ),
-                                                ]
-                                            )
-                                        ]
-                                    )
-                                ],
-                                width=12,
-                            ),
-                        ]
-                    ),
-                    html.Br(),
-                    dbc.Row(
-                        [
-                            dbc.Col(
-                                [
-                                    # talks by speaker
-                                    dbc.Card(
-                                        [
-                                            dbc.CardBody(
-                                                [
-                                                    html.Div(
-                                                        [
-                                                            html.Label("Top "),
-                                                            dcc.Input(
-                                                                id="talks-per-speaker-number",
-                                                                type="number",
-                                                                min=1,
-                                                                style=dict(
-                                                                    width="65px",
-                                                                    margin="0 5px",
+                                                        dcc.RangeSlider(
+                                                            id="time-series-year",
+                                                            min=talks.year_min,
+                                                            max=talks.year_max,
+                                                            step=1,
+                                                            marks=year_marks(
+                                                                talks.year_min,
+                                                                talks.year_max,
+                                                            ),
+                                                            value=[
+                                                                talks.year_min,
+                                                                talks.year_max,
+                                                            ],
+                                                        ),
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ],
+                                    width=12,
+                                ),
+                            ]
+                        ),
+                        html.Br(),
+                        dbc.Row(
+                            [
+                                dbc.Col(
+                                    [
+                                        # Engagement
+                                        dbc.Card(
+                                            [
+                                                dbc.CardBody(
+                                                    [
+                                                        dbc.Row(
+                                                            [
+                                                                dbc.Col(
+                                                                    dcc.Graph(
+                                                                        id="engagement-rate"
+                                                                    ),
+                                                                    width=4,
+                                                                ),
+                                                                dbc.Col(
+                                                                    dcc.Graph(
+                                                                        id="engagement-density"
+                                                                    ),
+                                                                    width=4,
                                                                 ),
+                                                                dbc.Col(
+                                                                    dcc.Graph(
+                                                                        id="engagement-percentiles"
+                                                                    ),
+                                                                    width=4,
+                                                                ),
+                                                            ]
+                                                        ),
+                                                        dcc.RangeSlider(
+                                                            id="engagement-year",
+                                                            min=talks.year_min,
+                                                            max=talks.year_max,
+                                                            step=1,
+                                                            marks=year_marks(
+                                                                talks.year_min,
+                                                                talks.year_max,
                                                             ),
-                                                            html.Label(" talks by "),
-                                                        ]
-                                                    ),
-                                                    html.Div(
-                                                        [
-                                                            dcc.Dropdown(
-                                                                id="talks-per-speaker-dropdown",
-                                                                options=sorted(
-                                                                    df["author"]
-                                                                    .str.strip(" '")
-                                                                    .unique()
+                                                            value=[
+                                                                talks.year_min,
+                                                                talks.year_max,
+                                                            ],
+                                                        ),
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ],
+                                    width=12,
+                                ),
+                            ]
+                        ),
+                        html.Br(),
+                        dbc.Row(
+                            [
+                                dbc.Col(
+                                    [
+                                        # talks by speaker
+                                        dbc.Card(
+                                            [
+                                                dbc.CardBody(
+                                                    [
+                                                        html.Div(
+                                                            [
+                                                                html.Label("Top "),
+                                                                dcc.Input(
+                                                                    id="talks-per-speaker-number",
+                                                                    type="number",
+                                                                    min=1,
+                                                                    style=dict(
+                                                                        width="65px",
+                                                                        margin="0 5px",
+                                                                    ),
                                                                 ),
-                                                                value=df.groupby(
-                                                                    "author"
+                                                                html.Label(
+                                                                    " talks by "
+                                                                ),
+                                                            ]
+                                                        ),
+                                                        html.Div(
+                                                            [
+                                                                dcc.Dropdown(
+                                                                    id="talks-per-speaker-dropdown",
+                                                                    options=talks.author_search.options(
+                                                                        ""
+                                                                    ),
+                                                                    value=talks.most_prolific(),
+                                                                    clearable=False,
+                                                                    style=dict(
+                                                                        color="black"
+                                                                    ),
                                                                 )
-                                                                .agg("count")
-                                                                .sort_values("views")[
-                                                                    -1:
-                                                                ]
-                                                                .index[0],
-                                                                clearable=False,
-                                                                style=dict(
-                                                                    color="black"
+                                                            ],
+                                                            style=dict(
+                                                                width="400px",
+                                                                margin="-32px 0px 0px 160px",
+                                                            ),
+                                                        ),
+                                                        html.Div(
+                                                            id="talks-per-speaker-content"
+                                                        ),
+                                                        html.Div(
+                                                            id="talks-per-speaker-export",
+                                                            style=EXPORT_STYLE,
+                                                        ),
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ],
+                                    width=12,
+                                ),
+                            ]
+                        ),
+                        html.Br(),
+                        dbc.Row(
+                            [
+                                dbc.Col(
+                                    [
+                                        # Talk search
+                                        dbc.Card(
+                                            [
+                                                dbc.CardBody(
+                                                    [
+                                                        html.Div(
+                                                            [
+                                                                html.Label("Top "),
+                                                                dcc.Input(
+                                                                    id="talk-search-number",
+                                                                    type="number",
+                                                                    min=1,
+                                                                    style=dict(
+                                                                        width="65px",
+                                                                        margin="0 5px",
+                                                                    ),
+                                                                ),
+                                                                html.Label(
+                                                                    " talks matching "
+                                                                ),
+                                                                dcc.Input(
+                                                                    id="talk-search-query",
+                                                                    type="search",
+                                                                    debounce=True,
+                                                                    placeholder="title or speaker words",
+                                                                    style=dict(
+                                                                        width="300px",
+                                                                        margin="0 5px",
+                                                                    ),
+                                                                ),
+                                                                dcc.Checklist(
+                                                                    id="talk-search-year",
+                                                                    options=[
+                                                                        {
+                                                                            "label": " within the top talks years",
+                                                                            "value": "year",
+                                                                        }
+                                                                    ],
+                                                                    value=[],
+                                                                    inline=True,
+                                                                    style=dict(
+                                                                        display="inline-block"
+                                                                    ),
                                                                 ),
-                                                            )
-                                                        ],
-                                                        style=dict(
-                                                            width="400px",
-                                                            margin="-32px 0px 0px 160px",
+                                                            ]
                                                         ),
-                                                    ),
-                                                    html.Div(
-                                                        id="talks-per-speaker-content"
-                                                    ),
-                                                ]
-                                            )
-                                        ]
-                                    )
-                                ],
-                                width=12,
-                            ),
-                        ]
-                    ),
-                ]
-            )
-        ),
+                                                        html.Br(),
+                                                        html.Div(
+                                                            id="talk-search-content"
+                                                        ),
+                                                        html.Div(
+                                                            id="talk-search-export",
+                                                            style=EXPORT_STYLE,
+                                                        ),
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ],
+                                    width=12,
+                                ),
+                            ]
+                        ),
+                    ]
+                )
+            ),
+            dcc.Interval(
+                id="ingest-interval",
+                interval=(refresh_seconds or 60) * 1000,
+                disabled=refresh_seconds is None,
+            ),
+            *[dcc.Store(id=store) for store in RENDERED_STORES],
+            dcc.Store(id=PAGE_STORE, data=secrets.token_urlsafe(16)),
+        ],
+        style=dict(padding="30px 50px", color="white"),
+    )
+
+
+# Build the Dash app around the dataset at `data_path`. Callbacks slower than
+# `slow_callback_seconds` are logged together with their inputs. With
+# `watch`, talks appended to that file or dropped into that directory are
+# ingested every `watch_seconds`. The app takes over the callbacks registered
+# in this module, so a second call raises instead of returning an app
+# without any.
+def create_app(
+    data_path=DATA_PATH,
+    mmap_mode=None,
+    slow_callback_seconds=None,
+    watch=None,
+    watch_seconds=5,
+):
+    global dash_app
+
+    if dash_app is not None:
+        raise RuntimeError("create_app() can only be called once per process")
+    # Followed from before the load, so no talk appended meanwhile is missed;
+    # the ones the load did read are not ingested twice
+    follower = Follower(watch, ingest, watch_seconds) if watch else None
+    load_data(data_path, mmap_mode)
+    app = Dash(__name__, external_stylesheets=[dbc.themes.CYBORG])
+    if follower:
+        if not hasattr(talks, "extend"):
+            raise ValueError("live ingestion needs a CSV data path")
+        follower.start()
+    app.layout = lambda: create_layout(talks, watch_seconds if watch else None)
+    metrics.slow_seconds = slow_callback_seconds
+    metrics.init_app(app.server)
+    export.init_app(app.server, lambda: talks)
+    # Dash registers the callbacks when the first request comes in, and a
+    # threaded worker would dispatch concurrent first requests before that
+    # is done, so register them up front
+    app._setup_server()
+    dash_app = app
+    return app
+
+
+# Function to extend the year sliders to ingested talks. A range that ended
+# at the last year keeps ending there, so the new talks come into view.
+@callback(
+    [
+        Output(slider, prop)
+        for slider in YEAR_SLIDERS
+        for prop in ["min", "max", "marks", "value"]
+    ],
+    Input("ingest-interval", "n_intervals"),
+    [
+        State(slider, prop)
+        for slider in YEAR_SLIDERS
+        for prop in ["min", "max", "value"]
     ],
-    style=dict(padding="30px 50px", color="white"),
 )
+@metrics.instrument
+def update_year_sliders(n_intervals, *sliders):
+    year_min, year_max = talks.year_min, talks.year_max
+    sliders = [sliders[i : i + 3] for i in range(0, len(sliders), 3)]
+    if all(first == year_min and last == year_max for first, last, _ in sliders):
+        raise PreventUpdate
+
+    outputs = []
+    marks = year_marks(year_min, year_max)
+    for first, last, value in sliders:
+        value = [
+            year_min if value[0] == first else value[0],
+            year_max if value[1] == last else value[1],
+        ]
+        outputs += [year_min, year_max, marks, value]
+    return outputs
+
+
+# Function to point the download links at the talks behind each view
+@callback(
+    Output("talks-export", "children"),
+    Output("talks-per-speaker-export", "children"),
+    Output("talk-search-export", "children"),
+    Input("talks-year", "value"),
+    Input("talks-per-speaker-dropdown", "value"),
+    Input("talk-search-query", "value"),
+    Input("talk-search-year", "value"),
+)
+@metrics.instrument
+def update_export_links(year, author, query, filters):
+    return (
+        export_links(year=year),
+        export_links(author=author),
+        export_links(q=query or None, year=year if filters else None),
+    )
 
 
-# Function to render talks content
-@app.callback(
+# Function to render talks content. Once the graph holds the full figure,
+# changing the number or the years only sends the new bars.
+@callback(
     Output("talks-content", "figure"),
     Output("talks-number", "value"),
+    Output("talks-rendered", "data"),
     Input("talks-number", "value"),
     Input("talks-year", "value"),
+    State("talks-rendered", "data"),
+    State(PAGE_STORE, "data"),
 )
-def update_talks_content(num, year):
-    if num is None:
-        num = 8
+@metrics.instrument
+def update_talks_content(num, year, rendered, page):
+    fig, num = render_talks_content(num, year)
+    if rendered:
+        return patch_figure(fig, ["x", "y", "customdata"]), num, no_update
+    return fig, num, True
 
-    selected_date_df = df[
-        (df["date"].dt.year >= year[0]) & (df["date"].dt.year <= year[1])
-    ]
-    selected_date_df = selected_date_df.sort_values("views")[-num:]
-    selected_date_df["date"] = selected_date_df["date"].dt.strftime("%b, %Y")
-
-    fig = px.bar(
-        selected_date_df, x="views", y="title", hover_data=selected_date_df.columns
-    )
 
-    fig.update_traces(marker_color="indianred")
+@figure_cache.memoize(
+    lambda num, year: (8 if num is None else num, *year), executor=renders
+)
+def render_talks_content(num, year):
+    if num is None:
+        num = 8
 
-    fig.add_trace(
-        go.Bar(
-            y=selected_date_df["title"],
-            x=selected_date_df["likes"],
-            name="likes",
-            orientation="h",
-            marker_color="lightsalmon",
-        )
-    )
+    top = talks.top(num, year)
+    metrics.lap("query")
 
-    fig.update_layout(
-        barmode="stack",
-        plot_bgcolor="rgba(0,0,0,0.1)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        autosize=True,
-        template="plotly_dark",
+    fig = top_talks_figure(
+        *(top[key][::-1] for key in ["title", "author", "date", "views", "likes"])
     )
 
-    return fig, min(num, selected_date_df.shape[0])
+    metrics.lap("figure")
+    return fig, min(num, len(top["title"]))
 
 
-# Function to render speakers content
-@app.callback(
+# Function to render speakers content: the speakers with the most views of
+# talks within the years, read from the per-author statistics. The markers
+# are patched once the graph holds the full figure.
+@callback(
     Output("speakers-content", "figure"),
     Output("speakers-number", "value"),
+    Output("speakers-rendered", "data"),
     Input("speakers-number", "value"),
+    Input("speakers-year", "value"),
+    State("speakers-rendered", "data"),
+    State(PAGE_STORE, "data"),
 )
-def update_speakers_content(num):
+@metrics.instrument
+def update_speakers_content(num, year, rendered, page):
+    fig, num = render_speakers_content(num, year)
+    if rendered:
+        paths = ["x", "y", "marker.color", "marker.size", "marker.sizeref"]
+        return patch_figure(fig, paths), num, no_update
+    return fig, num, True
+
+
+@figure_cache.memoize(
+    lambda num, year: (10 if num is None else num, *year), executor=renders
+)
+def render_speakers_content(num, year):
     if num is None:
         num = 10
 
-    top_speakers_by_count = df.groupby("author").agg("count").reset_index()
-    top_speakers_by_count = top_speakers_by_count[["author", "title"]].rename(
-        columns={"title": "video_count"}
-    )
-    df_with_count = df.sort_values("views")[-num:].merge(
-        top_speakers_by_count, on="author"
-    )
+    top = {key: values[::-1] for key, values in talks.top_speakers(num, year).items()}
+    metrics.lap("query")
 
-    fig = px.scatter(
-        df_with_count,
-        x="views",
-        y="author",
-        color="likes",
-        size="video_count",
-        size_max=30,
-        color_continuous_scale=px.colors.sequential.Redor,
+    fig = speakers_figure(top["author"], top["views"], top["likes"], top["count"])
+
+    metrics.lap("figure")
+    return fig, min(num, len(top["author"]))
+
+
+# Format counts as 1.2M / 3.4K strings
+def format_counts(values):
+    values = np.asarray(values, dtype=np.int64)
+    return np.where(
+        values > 1e6,
+        np.char.add((values / 1e6).astype(str), "M"),
+        np.where(
+            values > 1e3,
+            np.char.add((values / 1e3).astype(str), "K"),
+            values.astype(str),
+        ),
     )
 
-    fig.update_layout(
-        plot_bgcolor="rgba(0,0,0,0.1)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        autosize=True,
-        template="plotly_dark",
-        legend={"itemsizing": "trace"},
+
+# Linked table of the given talk columns
+def talks_table(columns):
+    views = format_counts(columns["views"])
+    likes = format_counts(columns["likes"])
+
+    return dbc.Table(
+        [
+            html.Thead(
+                html.Tr(
+                    [
+                        html.Th(col)
+                        for col in ["title", "author", "date", "views", "likes"]
+                    ]
+                )
+            )
+        ]
+        + [
+            html.Tbody(
+                [
+                    html.Tr(
+                        [html.Td(html.A(title, href=link))]
+                        + [html.Td(cell) for cell in cells]
+                    )
+                    for title, link, *cells in zip(
+                        columns["title"],
+                        columns["link"],
+                        columns["author"],
+                        columns["date"],
+                        views,
+                        likes,
+                    )
+                ]
+            )
+        ]
     )
-    fig.update_xaxes(showline=True)
-    fig.update_yaxes(showline=True)
 
-    return fig, min(num, df_with_count.shape[0])
+
+# Function to search speakers on the server as the user types
+@callback(
+    Output("talks-per-speaker-dropdown", "options"),
+    Input("talks-per-speaker-dropdown", "search_value"),
+    State("talks-per-speaker-dropdown", "value"),
+)
+@metrics.instrument
+def update_speaker_options(search, value):
+    if not search:
+        raise PreventUpdate
+
+    options = talks.author_search.options(search)
+    if value not in [option["value"] for option in options]:
+        options.append(dict(label=value, value=value))
+    return options
 
 
 # Function to render talks per speaker content
-@app.callback(
+@callback(
     Output("talks-per-speaker-content", "children"),
     Output("talks-per-speaker-number", "value"),
     Input("talks-per-speaker-number", "value"),
     Input("talks-per-speaker-dropdown", "value"),
+    State(PAGE_STORE, "data"),
+)
+@metrics.instrument
+def update_talks_per_speaker_content(num, dropdown, page):
+    return render_talks_per_speaker_content(num, dropdown)
+
+
+@figure_cache.memoize(
+    lambda num, dropdown: (5 if num is None else num, dropdown), executor=renders
 )
-def update_talks_per_speaker_content(num, dropdown):
+def render_talks_per_speaker_content(num, dropdown):
     if num is None:
         num = 5
 
-    author_df = df[df["author"] == dropdown].sort_values("views", ascending=False)[:num]
-    author_df["date"] = author_df["date"].dt.strftime("%b, %Y")
-    author_df["views"] = author_df["views"].apply(
-        lambda n: f"{n / 1e6}M" if n > 1e6 else f"{n / 1e3}K" if n > 1e3 else f"{n}"
-    )
-    author_df["likes"] = author_df["likes"].apply(
-        lambda n: f"{n / 1e6}M" if n > 1e6 else f"{n / 1e3}K" if n > 1e3 else f"{n}"
-    )
+    columns = talks.talks_by(dropdown, num)
+    metrics.lap("query")
 
-    return (
-        dbc.Table(
-            [
-                html.Thead(
-                    html.Tr(
-                        [html.Th(col) for col in author_df.drop("link", axis=1).columns]
-                    )
-                )
-            ]
-            + [
-                html.Tbody(
-                    [
-                        html.Tr(
-                            [
-                                html.Td(
-                                    html.A(
-                                        author_df.loc[index, "title"],
-                                        href=author_df.loc[index, "link"],
-                                    )
-                                )
-                            ]
-                            + [
-                                html.Td(cell)
-                                for cell in author_df.drop(["title", "link"], axis=1)
-                                .loc[index, :]
-                                .values
-                            ]
-                        )
-                        for index in author_df.index
-                    ]
-                )
-            ]
-        ),
-        min(num, author_df.shape[0]),
+    table = talks_table(columns)
+    metrics.lap("figure")
+
+    return table, min(num, len(columns["title"]))
+
+
+# Function to render talk search results
+@callback(
+    Output("talk-search-content", "children"),
+    Input("talk-search-number", "value"),
+    Input("talk-search-query", "value"),
+    Input("talk-search-year", "value"),
+    Input("talks-year", "value"),
+    State(PAGE_STORE, "data"),
+)
+@metrics.instrument
+def update_talk_search_content(num, query, filters, year, page):
+    return render_talk_search_content(num, query, filters, year)
+
+
+@figure_cache.memoize(
+    lambda num, query, filters, year: (
+        10 if num is None else num,
+        " ".join((query or "").split()).lower(),
+        *(year if filters else []),
+    ),
+    executor=renders,
+)
+def render_talk_search_content(num, query, filters, year):
+    if num is None:
+        num = 10
+    if not filters:
+        year = None
+
+    if query and query.strip():
+        columns = talks.search(query, num, year)
+    else:
+        columns = talks.top(num, year)
+    metrics.lap("query")
+
+    table = talks_table(columns)
+    metrics.lap("figure")
+
+    return table
+
+
+# Function to render the engagement panel: like-rate histogram, views vs
+# likes density and like-rate percentiles per year, all read from the
+# per-year bin counts, so a year range costs the same however many talks it
+# holds. Once the graphs hold the full figures, year changes keep the traces
+# and only send their values.
+@callback(
+    Output("engagement-rate", "figure"),
+    Output("engagement-density", "figure"),
+    Output("engagement-percentiles", "figure"),
+    Output("engagement-rendered", "data"),
+    Input("engagement-year", "value"),
+    State("engagement-rendered", "data"),
+    State(PAGE_STORE, "data"),
+)
+@metrics.instrument
+def update_engagement_content(year, rendered, page):
+    rate, density, percentiles = render_engagement_content(year)
+    if rendered:
+        return (
+            patch_figure(rate, ["x", "y"]),
+            patch_figure(density, ["x", "y", "z"]),
+            patch_figure(percentiles, ["x", "y"]),
+            no_update,
+        )
+    return rate, density, percentiles, True
+
+
+@figure_cache.memoize(lambda year: tuple(year), executor=renders)
+def render_engagement_content(year):
+    engagement = talks.engagement
+    edges, counts = engagement.rate_histogram(year)
+    grid = engagement.density_grid(year)
+    years, values = engagement.rate_percentiles(year, PERCENTILES)
+    metrics.lap("query")
+
+    figs = (
+        like_rate_figure(edges, counts),
+        density_figure(*grid),
+        percentiles_figure(years, values, [f"p{round(q * 100)}" for q in PERCENTILES]),
     )
 
+    metrics.lap("figure")
+    return figs
+
+
+# Dates of the first days of the given period codes, for date axes
+def period_dates(periods):
+    return (np.asarray(periods) - 1970 * 12).astype("datetime64[M]")
 
-# Function to render time series content
-@app.callback(
+
+# Function to render time series content. Switching between modes changes
+# titles and axes, so a figure is only patched when the graph holds the full
+# figure of the same mode.
+@callback(
     Output("time-series-content", "figure"),
+    Output("time-series-rendered", "data"),
     Input("time-series-dropdown", "value"),
     Input("time-series-year", "value"),
+    State("time-series-rendered", "data"),
+    State(PAGE_STORE, "data"),
 )
-def update_time_series_content(dropdown, year):
-    selected_date_df = df[
-        (df["date"].dt.year >= year[0]) & (df["date"].dt.year <= year[1])
+@metrics.instrument
+def update_time_series_content(dropdown, year, rendered, page):
+    fig = render_time_series_content(dropdown, year)
+    if not fig["data"]:
+        return fig, None
+    if rendered != dropdown:
+        return fig, dropdown
+
+    ticks = [
+        f"{axis}.tickvals"
+        for axis in ["xaxis", "xaxis2"]
+        if "tickvals" in fig["layout"][axis]
     ]
-    selected_date_df = selected_date_df.sort_values("views")
+    return patch_figure(fig, ["x", "y"], ticks), no_update
+
 
-    fig = go.Figure()
+@figure_cache.memoize(lambda dropdown, year: (dropdown, *year), executor=renders)
+def render_time_series_content(dropdown, year):
+    fig = dict(data=[], layout=BASE_LAYOUT)
 
     if dropdown == "month":
-        videos_per_month = (
-            selected_date_df.groupby(selected_date_df["date"].dt.month)
-            .agg("count")["views"]
-            .reset_index()
-        )
-        videos_per_month = videos_per_month.rename(
-            columns={"date": "month", "views": "count"}
-        )
+        months, counts, mean_views = talks.by_month(year)
+        metrics.lap("query")
 
-        views_per_upload_month = (
-            selected_date_df.groupby(selected_date_df["date"].dt.month)["views"]
-            .mean()
-            .reset_index()
-        )
-        views_per_upload_month = views_per_upload_month.rename(
-            columns={"date": "month"}
+        fig = time_series_figure(
+            months,
+            [
+                ("Total videos uploaded per month", "counts", "count", counts),
+                ("Average views per upload month", "views", "views", mean_views),
+            ],
+            "month",
+            tickvals=np.arange(1, 13),
         )
 
-        fig = make_subplots(
-            rows=2,
-            cols=1,
-            subplot_titles=(
-                "Total videos uploaded per month",
-                "Average views per upload month",
-            ),
-        )
+    elif dropdown == "year":
+        years, counts, total_views = talks.by_year(year)
+        metrics.lap("query")
 
-        fig.append_trace(
-            go.Scatter(
-                x=videos_per_month["month"],
-                y=videos_per_month["count"],
-                name="counts",
-            ),
-            row=1,
-            col=1,
+        fig = time_series_figure(
+            years,
+            [
+                ("Total videos uploaded per year", "counts", "count", counts),
+                ("Total views per upload year", "views", "views", total_views),
+            ],
+            "year",
+            tickvals=np.arange(year[0], year[1] + 1),
+            tickangle=-45,
         )
 
-        fig.update_xaxes(title_text="month", row=1, col=1, tickvals=np.arange(1, 13))
-        fig.update_yaxes(title_text="count", row=1, col=1)
+    elif dropdown == "quarter":
+        quarters, counts, total_views = talks.by_quarter(year)
+        metrics.lap("query")
 
-        fig.append_trace(
-            go.Scatter(
-                x=views_per_upload_month["month"],
-                y=views_per_upload_month["views"],
-                name="views",
-            ),
-            row=2,
-            col=1,
+        fig = time_series_figure(
+            period_dates(quarters),
+            [
+                ("Total videos uploaded per quarter", "counts", "count", counts),
+                ("Total views per upload quarter", "views", "views", total_views),
+            ],
+            "quarter",
         )
 
-        fig.update_xaxes(title_text="month", row=2, col=1, tickvals=np.arange(1, 13))
-        fig.update_yaxes(title_text="views", row=2, col=1)
+    elif dropdown == "year-month":
+        months, counts, total_views = talks.by_year_month(year)
+        metrics.lap("query")
 
-    elif dropdown == "year":
-        videos_per_year = (
-            selected_date_df.groupby(selected_date_df["date"].dt.year)
-            .agg("count")["views"]
-            .reset_index()
-        )
-        videos_per_year = videos_per_year.rename(
-            columns={"date": "year", "views": "count"}
+        fig = time_series_figure(
+            period_dates(months),
+            [
+                ("Total videos uploaded per month", "counts", "count", counts),
+                ("Total views per upload month", "views", "views", total_views),
+            ],
+            "month",
         )
 
-        views_per_upload_year = (
-            selected_date_df.groupby(selected_date_df["date"].dt.year)["views"]
-            .sum()
-            .reset_index()
-        )
-        views_per_upload_year = views_per_upload_year.rename(columns={"date": "year"})
-
-        fig = make_subplots(
-            rows=2,
-            cols=1,
-            subplot_titles=(
-                "Total videos uploaded per year",
-                "Total views per upload year",
-            ),
-        )
+    elif dropdown in ROLLING_MONTHS:
+        window = ROLLING_MONTHS[dropdown]
+        months, counts, views = talks.rolling(year, window)
+        metrics.lap("query")
 
-        fig.append_trace(
-            go.Scatter(
-                x=videos_per_year["year"], y=videos_per_year["count"], name="counts"
-            ),
-            row=1,
-            col=1,
-        )
-
-        fig.update_xaxes(
-            title_text="year",
-            row=1,
-            col=1,
-            tickvals=np.arange(year[0], year[1] + 1),
-            tickangle=-45,
+        fig = time_series_figure(
+            period_dates(months),
+            [
+                (f"Videos uploaded per month, {dropdown}", "counts", "count", counts),
+                (f"Views per upload month, {dropdown}", "views", "views", views),
+            ],
+            "month",
         )
-        fig.update_yaxes(title_text="count", row=1, col=1)
 
-        fig.append_trace(
-            go.Scatter(
-                x=views_per_upload_year["year"],
-                y=views_per_upload_year["views"],
-                name="views",
-            ),
-            row=2,
-            col=1,
-        )
+    elif dropdown == "cumulative":
+        months, counts, total_views = talks.cumulative(year)
+        metrics.lap("query")
 
-        fig.update_xaxes(
-            title_text="year",
-            row=2,
-            col=1,
-            tickvals=np.arange(year[0], year[1] + 1),
-            tickangle=-45,
+        fig = time_series_figure(
+            period_dates(months),
+            [
+                ("Cumulative videos uploaded", "counts", "count", counts),
+                ("Cumulative views", "views", "views", total_views),
+            ],
+            "month",
         )
-        fig.update_yaxes(title_text="views", row=2, col=1)
-
-    fig.update_layout(
-        plot_bgcolor="rgba(0,0,0,0.1)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        autosize=True,
-        template="plotly_dark",
-        height=720,
-    )
-    fig.update_xaxes(showline=True)
-    fig.update_yaxes(showline=True)
 
+    metrics.lap("figure")
     return fig
 
 
 # main call
 if __name__ == "__main__":
-    app.run_server(debug=True)
+    create_app(watch=os.environ.get("TED_TALKS_WATCH")).run_server(debug=True)
@@ -0,0 +1,207 @@
+# Benchmark the dashboard callbacks over synthetic TED-like datasets.
+# Run from the repository root, e.g.
+#   python scripts/benchmark.py --sizes 5000 50000 --output benchmark.json
+# The function rendering each callback's full output is invoked directly,
+# bypassing the figure cache, over a sweep of realistic inputs; latency
+# percentiles, peak traced memory and serialized payload size are written to
+# a JSON file for comparison between commits.
+
+import argparse
+import inspect
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from plotly.io.json import to_json_plotly
+
+import app
+
+SIZES = [5_000, 50_000, 500_000, 5_000_000]
+MONTHS = np.array(
+    [
+        "January",
+        "February",
+        "March",
+        "April",
+        "May",
+        "June",
+        "July",
+        "August",
+        "September",
+        "October",
+        "November",
+        "December",
+    ]
+)
+WORDS = np.array(
+    "why how the future of climate science art power your brain we can what "
+    "learn data love city ocean money life secret history body world music "
+    "energy space mind design time work children health hope change water".split()
+)
+
+
+# Write a CSV with the `title,author,date,views,likes,link` schema
+def generate_dataset(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    n_authors = max(rows // 3, 1)
+    first = rng.choice(WORDS, n_authors).astype(object)
+    last = rng.choice(WORDS, n_authors).astype(object)
+    names = first + " " + last + " " + np.arange(n_authors).astype(str)
+    authors = names[np.minimum(rng.zipf(1.6, rows) - 1, n_authors - 1)]
+
+    title_words = rng.choice(WORDS, (rows, 5)).astype(object)
+    titles = title_words[:, 0]
+    for i in range(1, 5):
+        titles = titles + " " + title_words[:, i]
+    titles = titles + " " + np.arange(rows).astype(str)
+
+    dates = (
+        MONTHS[rng.integers(0, 12, rows)].astype(object)
+        + " "
+        + rng.integers(2000, 2023, rows).astype(str)
+    )
+    views = rng.lognormal(13, 1.2, rows).astype(np.int64)
+    likes = (views * rng.uniform(0.01, 0.05, rows)).astype(np.int64)
+    slugs = pd.Series(authors + " " + titles).str.lower().str.replace(" ", "_")
+
+    pd.DataFrame(
+        dict(
+            title=titles,
+            author=authors,
+            date=dates,
+            views=views,
+            likes=likes,
+            link="https://ted.com/talks/" + slugs,
+        )
+    ).to_csv(path, index=False)
+
+
+# (callback, list of argument tuples) pairs covering realistic interactions
+def input_sweeps(talks, rng):
+    first, last = talks.year_min, talks.year_max
+    ranges = [(first, last), (last - 4, last), (last, last)]
+    ranges += [(y, min(y + 5, last)) for y in range(first, last + 1, 2)]
+    ranges = [list(year) for year in ranges]
+
+    names = np.asarray(talks.author_search.names)
+    authors = list(names[talks.author_search.top_codes[:5]])
+    authors += list(rng.choice(names, 15))
+
+    # Search queries: short prefixes, which match the most words, whole
+    # words and AND queries of several words, the last one a prefix
+    queries = ["a", "th", "cl", "climate", "why the", "how we can", "data love c"]
+    queries += [" ".join(rng.choice(WORDS, 2)) for _ in range(5)]
+
+    return [
+        (
+            app.render_talks_content,
+            [(num, year) for num in [None, 20, 50] for year in ranges],
+        ),
+        (
+            app.render_speakers_content,
+            [(num, year) for num in [None, 25] for year in ranges],
+        ),
+        (
+            app.render_talks_per_speaker_content,
+            [(num, author) for num in [None, 20] for author in authors],
+        ),
+        (
+            app.render_time_series_content,
+            [(mode, year) for mode in app.TIME_SERIES_MODES for year in ranges],
+        ),
+        (app.render_engagement_content, [(year,) for year in ranges]),
+        (
+            app.render_talk_search_content,
+            [
+                (num, query, filters, year)
+                for num in [None, 50]
+                for query in queries
+                for filters, year in [([], ranges[0])]
+                + [(["year"], year) for year in ranges[:3]]
+            ],
+        ),
+    ]
+
+
+def measure(callback, sweep, repeat):
+    func = inspect.unwrap(callback)
+    latencies = []
+    for _ in range(repeat):
+        for args in sweep:
+            start = time.perf_counter()
+            func(*args)
+            latencies.append(time.perf_counter() - start)
+
+    payloads = []
+    tracemalloc.start()
+    for args in sweep:
+        payloads.append(len(to_json_plotly(func(*args))))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1e3
+    return dict(
+        calls=len(latencies),
+        latency_ms={
+            f"p{q}": float(np.percentile(latencies, q)) for q in [50, 90, 95, 99]
+        }
+        | dict(mean=float(latencies.mean()), max=float(latencies.max())),
+        peak_memory_bytes=peak,
+        payload_bytes=dict(mean=float(np.mean(payloads)), max=int(np.max(payloads))),
+    )
+
+
+def run(sizes, data_dir, repeat):
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    for size in sizes:
+        path = os.path.join(data_dir, f"synthetic-{size}.csv")
+        if not os.path.exists(path):
+            generate_dataset(path, size)
+
+        start = time.perf_counter()
+        app.load_data(path)
+        load_seconds = time.perf_counter() - start
+
+        callbacks = {}
+        rng = np.random.default_rng(0)
+        for callback, sweep in input_sweeps(app.talks, rng):
+            callbacks[callback.__name__] = measure(callback, sweep, repeat)
+            print(
+                f"{size:>9} rows  {callback.__name__:<36}"
+                f" p50 {callbacks[callback.__name__]['latency_ms']['p50']:8.2f} ms"
+            )
+        results.append(dict(rows=size, load_seconds=load_seconds, callbacks=callbacks))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--data-dir", default="data/synthetic")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    report = dict(
+        commit=git_commit(),
+        created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        results=run(args.sizes, args.data_dir, args.repeat),
+    )
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
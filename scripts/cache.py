@@ -0,0 +1,124 @@
+import functools
+import threading
+
+import numpy as np
+
+from collections import OrderedDict
+from dash.development.base_component import Component
+
+
+# Rough serialized size of a cached output, found without serializing it:
+# Dash does that once more for the response. Arrays of numbers count their
+# bytes, strings their length, and containers and components what they hold.
+# `known` maps the ids of objects shared by many outputs to their sizes.
+def estimate_size(value, known=None):
+    if known and id(value) in known:
+        return known[id(value)]
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return value.nbytes + value.size
+    if isinstance(value, dict):
+        return sum(
+            len(key) + 4 + estimate_size(item, known) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return sum(estimate_size(item, known) + 1 for item in value) + 2
+    if isinstance(value, Component):
+        props = vars(value)
+        return 64 + sum(
+            len(key) + 4 + estimate_size(props[key], known)
+            for key in props
+            if key in value._prop_names
+        )
+    return 8
+
+
+# Bounded LRU cache for rendered callback outputs. Entries are keyed on the
+# callback name plus its normalized inputs and evicted by entry count and by
+# the estimated serialized size of the cached outputs. The `shared` objects
+# (e.g. a template every figure holds) are sized once.
+class FigureCache:
+    def __init__(self, max_entries=256, max_bytes=32 * 2**20, shared=()):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared = list(shared)
+        self._known = {id(value): estimate_size(value) for value in self.shared}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    # The cached value of `key`, or else `render()`, stored. With an
+    # executor, misses are rendered and stored on its pool.
+    def get(self, key, render, executor=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            generation = self._generation
+
+        if executor is None:
+            return self._store(key, render(), generation)
+        return executor.run(key, lambda: self._store(key, render(), generation))
+
+    def _store(self, key, value, generation):
+        size = estimate_size(value, self._known)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            # Rendered from data that was invalidated meanwhile
+            if generation != self._generation:
+                return value
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._bytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return value
+
+    # Decorator caching a callback on `normalize(*args)`, so that inputs
+    # rendering the same output share one entry
+    def memoize(self, normalize, executor=None):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = (func.__name__,) + tuple(normalize(*args))
+                return self.get(key, lambda: func(*args), executor)
+
+            return wrapper
+
+        return decorator
+
+    # Drop every entry, e.g. after the dataset is reloaded
+    def clear(self):
+        self.discard(lambda key: True)
+
+    # Drop the entries whose key satisfies `stale`, e.g. the outputs that
+    # appended rows change
+    def discard(self, stale):
+        with self._lock:
+            for key in [key for key in self._entries if stale(key)]:
+                self._bytes -= self._entries.pop(key)[1]
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                invalidations=self.invalidations,
+            )
@@ -0,0 +1,414 @@
+# SQLite data backend for catalogues larger than RAM. Build the database from
+# the CSV file once, from the repository root:
+#   python scripts/database.py data/ted-talks.csv data/ted-talks.db
+# and serve it by passing the .db file as the data path (e.g. TED_TALKS_DATA).
+# Every callback then issues one bounded query against indexed tables and
+# per-(author, year) and per-period aggregates; only author names, for the
+# speaker search, and the per-year engagement bin counts are kept in memory.
+
+import argparse
+import os
+import pathlib
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from search import AuthorSearch, normalize, query_terms
+from snapshot import clean_talks
+from store import (
+    COUNT_BINS,
+    RATE_BINS,
+    EngagementStats,
+    count_bins,
+    cumulative_sums,
+    period_labels,
+    period_sums,
+    rate_bins,
+    rolling_means,
+)
+
+SCHEMA = """
+CREATE TABLE staging (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    link TEXT,
+    author TEXT,
+    period INTEGER,
+    views INTEGER,
+    likes INTEGER,
+    rate_bin INTEGER,
+    views_bin INTEGER,
+    likes_bin INTEGER
+);
+CREATE TABLE authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE,
+    talks INTEGER,
+    views INTEGER,
+    likes INTEGER
+);
+CREATE TABLE talks (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    link TEXT,
+    author_id INTEGER REFERENCES authors,
+    period INTEGER,
+    year INTEGER,
+    views INTEGER,
+    likes INTEGER
+);
+CREATE TABLE author_years (
+    author_id INTEGER,
+    year INTEGER,
+    count INTEGER,
+    views INTEGER,
+    likes INTEGER,
+    PRIMARY KEY (author_id, year)
+) WITHOUT ROWID;
+CREATE TABLE periods (
+    period INTEGER PRIMARY KEY,
+    count INTEGER,
+    views INTEGER
+);
+CREATE TABLE engagement_rates (
+    year INTEGER,
+    bin INTEGER,
+    count INTEGER,
+    PRIMARY KEY (year, bin)
+) WITHOUT ROWID;
+CREATE TABLE engagement_density (
+    year INTEGER,
+    views_bin INTEGER,
+    likes_bin INTEGER,
+    count INTEGER,
+    PRIMARY KEY (year, views_bin, likes_bin)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE talk_words USING fts5(text, content='');
+"""
+
+# The engagement tables hold the bin counts of store.EngagementStats.
+# clean_talks() keeps the first row per link within a chunk; the first
+# DELETE does the same across chunks.
+# Authors get ids in name order, like the categorical codes of TalksTable.
+# Talks are numbered by view rank, so the full-text index lists matches most
+# viewed first and a search stops after the first `num` of them.
+BUILD = """
+DELETE FROM staging WHERE id NOT IN (SELECT MIN(id) FROM staging GROUP BY link);
+INSERT INTO authors (id, name)
+SELECT ROW_NUMBER() OVER (ORDER BY author) - 1, author
+FROM (SELECT DISTINCT author FROM staging);
+INSERT INTO talks
+SELECT
+    ROW_NUMBER() OVER (ORDER BY s.views DESC, s.id) - 1,
+    s.title, s.link, a.id, s.period, s.period / 12, s.views, s.likes
+FROM staging s JOIN authors a ON a.name = s.author;
+INSERT INTO engagement_rates
+SELECT period / 12, rate_bin, COUNT(*) FROM staging GROUP BY period / 12, rate_bin;
+INSERT INTO engagement_density
+SELECT period / 12, views_bin, likes_bin, COUNT(*)
+FROM staging GROUP BY period / 12, views_bin, likes_bin;
+DROP TABLE staging;
+INSERT INTO talk_words (rowid, text) SELECT id, search_text(title, link) FROM talks;
+
+INSERT INTO author_years
+SELECT author_id, year, COUNT(*), SUM(views), SUM(likes)
+FROM talks GROUP BY author_id, year;
+UPDATE authors SET (talks, views, likes) = (
+    SELECT SUM(count), SUM(views), SUM(likes)
+    FROM author_years WHERE author_id = authors.id
+);
+INSERT INTO periods
+SELECT period, COUNT(*), SUM(views) FROM talks GROUP BY period;
+
+CREATE INDEX talks_year_views ON talks (year, views DESC);
+CREATE INDEX talks_author_views ON talks (author_id, views DESC);
+ANALYZE;
+VACUUM;
+"""
+
+COLUMNS = (
+    "SELECT t.id, t.title, t.link, t.author_id, a.name, t.period, t.views, t.likes"
+)
+TALKS = "FROM talks t JOIN authors a ON a.id = t.author_id"
+IN_YEARS = f"{TALKS} WHERE t.year BETWEEN ? AND ? ORDER BY t.year, t.views DESC, t.id"
+BY_AUTHOR = (
+    f"{TALKS} WHERE t.author_id = (SELECT id FROM authors WHERE name = ?)"
+    " ORDER BY t.views DESC, t.id"
+)
+MATCHING = (
+    "FROM talk_words w CROSS JOIN talks t ON t.id = w.rowid"
+    " JOIN authors a ON a.id = t.author_id"
+    " WHERE talk_words MATCH ? AND t.year BETWEEN ? AND ? ORDER BY w.rowid"
+)
+
+
+# Indexed text of a talk: its title and link slug, normalized
+def search_text(title, link):
+    return normalize(f"{title} {link.rsplit('/', 1)[-1]}")
+
+
+# Build the database at `path` from the CSV file, reading it in chunks
+def import_csv(source, path, chunk_size=100_000):
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    db = sqlite3.connect(tmp)
+    db.execute("PRAGMA journal_mode = OFF")
+    db.execute("PRAGMA synchronous = OFF")
+    db.executescript(SCHEMA)
+    db.create_function("search_text", 2, search_text, deterministic=True)
+
+    start = 0
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        df = clean_talks(chunk)
+        ids = np.arange(start, start + len(df)).tolist()
+        start += len(df)
+        period = (df["date"].dt.year * 12 + df["date"].dt.month - 1).tolist()
+        views, likes = df["views"].to_numpy(), df["likes"].to_numpy()
+        db.executemany(
+            "INSERT INTO staging VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            zip(
+                ids,
+                df["title"],
+                df["link"],
+                df["author"],
+                period,
+                views.tolist(),
+                likes.tolist(),
+                rate_bins(views, likes).tolist(),
+                count_bins(views).tolist(),
+                count_bins(likes).tolist(),
+            ),
+        )
+    db.commit()
+
+    db.executescript(BUILD)
+    db.close()
+    os.replace(tmp, path)
+
+
+def _to_columns(rows):
+    ids, title, link, author_ids, author, period, views, likes = (
+        list(zip(*rows)) or [()] * 8
+    )
+    period = np.array(period, dtype=np.int64)
+    return dict(
+        id=np.array(ids, dtype=np.int64),
+        title=np.array(title, dtype=object),
+        link=np.array(link, dtype=object),
+        author_id=np.array(author_ids, dtype=np.int64),
+        author=np.array(author, dtype=object),
+        date=period_labels(period),
+        period=period,
+        views=np.array(views, dtype=np.int64),
+        likes=np.array(likes, dtype=np.int64),
+    )
+
+
+# FTS5 query matching every (token, prefix) term
+def _match(terms):
+    return " ".join(
+        '"' + token.replace('"', '""') + '"' + ("*" if prefix else "")
+        for token, prefix in terms
+    )
+
+
+# Data backend answering the dashboard's queries from the database built by
+# import_csv(). Connections are read-only and opened per thread.
+class SQLiteTalks:
+    def __init__(self, path):
+        self.uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+        self._local = threading.local()
+
+        db = self._db()
+        self.year_min, self.year_max = db.execute(
+            "SELECT MIN(year), MAX(year) FROM talks"
+        ).fetchone()
+        names, counts = zip(*db.execute("SELECT name, talks FROM authors ORDER BY id"))
+        self.author_search = AuthorSearch(names, counts)
+        self.engagement = self._engagement(db)
+
+    # The engagement tables as the dense bin counts of EngagementStats
+    def _engagement(self, db):
+        n_years = self.year_max - self.year_min + 1
+        rates = np.zeros((n_years, RATE_BINS), dtype=np.int64)
+        year, bins, count = np.array(
+            db.execute("SELECT year, bin, count FROM engagement_rates").fetchall(),
+            dtype=np.int64,
+        ).T
+        rates[year - self.year_min, bins] = count
+        density = np.zeros((n_years, COUNT_BINS, COUNT_BINS), dtype=np.int64)
+        year, views, likes, count = np.array(
+            db.execute("SELECT * FROM engagement_density").fetchall(), dtype=np.int64
+        ).T
+        density[year - self.year_min, views, likes] = count
+        return EngagementStats(self.year_min, rates, density)
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.uri, uri=True)
+        return db
+
+    def _columns(self, sql, params):
+        return _to_columns(self._db().execute(f"{COLUMNS} {sql}", params).fetchall())
+
+    def _years(self, year):
+        if year is None:
+            return self.year_min, self.year_max
+        return max(year[0], self.year_min), min(year[1], self.year_max)
+
+    # The `num` most viewed talks within the year range: the head of each
+    # year's (year, views) index range, merged
+    def top(self, num, year=None):
+        first, last = self._years(year)
+        if first > last:
+            return self._columns(f"{TALKS} WHERE 0", ())
+
+        heads = " UNION ALL ".join(
+            [
+                "SELECT * FROM (SELECT id FROM talks WHERE year = ?"
+                " ORDER BY views DESC, id LIMIT ?)"
+            ]
+            * (last - first + 1)
+        )
+        params = [value for y in range(first, last + 1) for value in (y, num)]
+        return self._columns(
+            f"{TALKS} WHERE t.id IN ({heads}) ORDER BY t.views DESC, t.id LIMIT ?",
+            params + [num],
+        )
+
+    # The author's `num` most viewed talks
+    def talks_by(self, author, num):
+        return self._columns(f"{BY_AUTHOR} LIMIT ?", (author, num))
+
+    # The `num` most viewed talks matching every term of the query, read in
+    # rank order from the full-text index
+    def search(self, query, num, year=None):
+        terms = query_terms(query)
+        if not terms:
+            return self.top(num, year)
+
+        return self._columns(
+            f"{MATCHING} LIMIT ?", (_match(terms), *self._years(year), num)
+        )
+
+    # Every talk of an author, matching a query or within the year range, as
+    # column chunks of up to `chunk_size` rows. The rows stream from a cursor
+    # on a connection of their own.
+    def export(self, chunk_size, year=None, author=None, query=None):
+        terms = query_terms(query or "")
+        if author is not None:
+            sql, params = BY_AUTHOR, (author,)
+        elif terms:
+            sql, params = MATCHING, (_match(terms), *self._years(year))
+        else:
+            sql, params = IN_YEARS, self._years(year)
+
+        db = sqlite3.connect(self.uri, uri=True)
+        try:
+            cursor = db.execute(f"{COLUMNS} {sql}", params)
+            while rows := cursor.fetchmany(chunk_size):
+                yield _to_columns(rows)
+        finally:
+            db.close()
+
+    # The `num` authors with the most views of talks within the year range:
+    # their ids, names, talk counts, views and likes there. The whole range
+    # reads the authors' totals.
+    def top_speakers(self, num, year):
+        first, last = self._years(year)
+        if first <= self.year_min and last >= self.year_max:
+            sql, params = "SELECT id, name, talks, views, likes FROM authors", ()
+        else:
+            sql = (
+                "SELECT a.id, a.name, SUM(y.count), SUM(y.views), SUM(y.likes)"
+                " FROM author_years y JOIN authors a ON a.id = y.author_id"
+                " WHERE y.year BETWEEN ? AND ? GROUP BY a.id"
+            )
+            params = (first, last)
+        rows = self._db().execute(
+            f"SELECT * FROM ({sql}) ORDER BY 4 DESC, 1 LIMIT ?", (*params, num)
+        )
+        ids, names, count, views, likes = list(zip(*rows)) or [()] * 5
+        return dict(
+            author_id=np.array(ids, dtype=np.int64),
+            author=np.array(names, dtype=object),
+            count=np.array(count, dtype=np.int64),
+            views=np.array(views, dtype=np.int64),
+            likes=np.array(likes, dtype=np.int64),
+        )
+
+    def most_prolific(self):
+        return (
+            self._db()
+            .execute("SELECT name FROM authors ORDER BY talks DESC, id LIMIT 1")
+            .fetchone()[0]
+        )
+
+    def _periods(self, key, year):
+        first, last = self._years(year)
+        rows = self._db().execute(
+            f"SELECT {key} AS k, SUM(count), SUM(views) FROM periods"
+            " WHERE period BETWEEN ? AND ? GROUP BY k ORDER BY k",
+            (first * 12, last * 12 + 11),
+        )
+        keys, counts, views = list(zip(*rows)) or [()] * 3
+        return np.array(keys, dtype=np.int64), np.array(counts, dtype=np.int64), views
+
+    # Talk counts and average views per calendar month within the year range
+    def by_month(self, year):
+        months, counts, views = self._periods("period % 12 + 1", year)
+        return months, counts, np.array(views, dtype=np.int64) / counts
+
+    # Talk counts and total views per year within the year range
+    def by_year(self, year):
+        years, counts, views = self._periods("period / 12", year)
+        return years, counts, np.array(views, dtype=np.int64)
+
+    # Monthly counts and views of the year range, preceded by up to `before`
+    # earlier months: (period code of the first month, counts, views)
+    def _months(self, year, before=0):
+        first, last = self._years(year)
+        start = max(first * 12 - before, self.year_min * 12)
+        size = max((last + 1) * 12 - start, 0)
+        rows = self._db().execute(
+            "SELECT period, count, views FROM periods WHERE period >= ? AND period < ?",
+            (start, start + size),
+        )
+        periods, counts, views = (
+            np.array(rows.fetchall(), dtype=np.int64).reshape(-1, 3).T
+        )
+        dense = np.zeros((2, size), dtype=np.int64)
+        dense[:, periods - start] = counts, views
+        return start, dense[0], dense[1]
+
+    # Talk counts and total views per quarter within the year range
+    def by_quarter(self, year):
+        return period_sums(*self._months(year), size=3)
+
+    # Talk counts and total views per month within the year range, in order
+    def by_year_month(self, year):
+        return period_sums(*self._months(year))
+
+    # Talk counts and views per month averaged over the `window` months up to
+    # each month of the year range
+    def rolling(self, year, window):
+        start, counts, views = self._months(year, window - 1)
+        return rolling_means(start, counts, views, window, self._years(year)[0] * 12)
+
+    # Running totals of talks and views per month within the year range
+    def cumulative(self, year):
+        return cumulative_sums(*self._months(year))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", help="talks CSV file")
+    parser.add_argument("database", help="SQLite file to create")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    import_csv(args.source, args.database, args.chunk_size)
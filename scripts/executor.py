@@ -0,0 +1,96 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from dash import ctx
+from dash.exceptions import MissingCallbackContextException, PreventUpdate
+
+# Store holding an id of every page load, a State of the rendering callbacks
+PAGE_STORE = "page-id"
+
+
+class _Flight:
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+# Supersede slot of the callback request being handled: its page and
+# callback. Initial renders have none, as the page shows nothing until they
+# answer.
+def _slot(key):
+    try:
+        if ctx.triggered_id is None:
+            return None
+        page = ctx.states.get(f"{PAGE_STORE}.data")
+    except MissingCallbackContextException:
+        return None
+    return (page, key[0]) if page else None
+
+
+# Bounded thread pool for rendering callback outputs. Identical requests in
+# flight share one task, keyed like the figure cache. A request is superseded
+# when the same page asks the same callback again, e.g. while dragging a
+# slider: it returns without an update, and its task is cancelled if it has
+# not started and nobody else waits for it. A task that has started still
+# stores its output.
+class RenderExecutor:
+    def __init__(self, max_workers=4, wrap=None):
+        self.wrap = wrap or (lambda func: func)
+        self.submitted = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.cancelled = 0
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="render")
+        self._flights = {}
+        self._latest = {}
+        # Reentrant: cancelling a future runs its done callbacks right away
+        self._lock = threading.RLock()
+
+    # Result of `func()` for `key`, computed on the pool unless a task for
+    # the key is in flight already. `key[0]` names the callback.
+    def run(self, key, func):
+        slot = _slot(key)
+        waiter = threading.Event()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(
+                    self._pool.submit(self.wrap(func))
+                )
+                flight.future.add_done_callback(lambda _: self._land(key, flight))
+                self.submitted += 1
+            else:
+                self.coalesced += 1
+            flight.waiters += 1
+            if slot:
+                if slot in self._latest:
+                    self._latest[slot].set()
+                self._latest[slot] = waiter
+        flight.future.add_done_callback(lambda _: waiter.set())
+        waiter.wait()
+
+        with self._lock:
+            flight.waiters -= 1
+            if slot and self._latest.get(slot) is waiter:
+                del self._latest[slot]
+            if not flight.future.done():
+                self.superseded += 1
+                if not flight.waiters and flight.future.cancel():
+                    self.cancelled += 1
+                raise PreventUpdate
+        return flight.future.result()
+
+    def _land(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                submitted=self.submitted,
+                coalesced=self.coalesced,
+                superseded=self.superseded,
+                cancelled=self.cancelled,
+                in_flight=len(self._flights),
+            )
@@ -0,0 +1,167 @@
+# Download route for the talks behind a view: /export?format=csv|parquet
+# with year=<first>&year=<last>, author=<name> or q=<search query>. The
+# selection streams from the data backend in fixed-size chunks, and each
+# chunk is serialized and sent before the next is read, so a request holds
+# one chunk in memory however many rows it exports.
+
+import csv
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from flask import Response, abort, request
+from urllib.parse import urlencode
+
+CHUNK_ROWS = 10_000
+
+MONTH_NAMES = np.array(
+    [
+        "January",
+        "February",
+        "March",
+        "April",
+        "May",
+        "June",
+        "July",
+        "August",
+        "September",
+        "October",
+        "November",
+        "December",
+    ]
+)
+
+SCHEMA = pa.schema(
+    [
+        ("title", pa.string()),
+        ("author", pa.string()),
+        ("date", pa.date32()),
+        ("views", pa.int64()),
+        ("likes", pa.int64()),
+        ("link", pa.string()),
+    ]
+)
+
+
+# Rows in the layout of the source CSV file, dates as "%B %Y"
+def csv_chunks(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(SCHEMA.names)
+    for columns in chunks:
+        period = columns["period"]
+        dates = np.char.add(
+            np.char.add(MONTH_NAMES[period % 12], " "), (period // 12).astype(str)
+        )
+        writer.writerows(
+            zip(
+                columns["title"],
+                columns["author"],
+                dates,
+                columns["views"],
+                columns["likes"],
+                columns["link"],
+            )
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# Write-only file that hands out what was written since the last take().
+# Parquet writers record offsets from tell(), so it counts every byte.
+class _Sink(io.RawIOBase):
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+# One Parquet row group per chunk, dates as the first day of their month
+def parquet_chunks(chunks):
+    sink = _Sink()
+    with pq.ParquetWriter(sink, SCHEMA) as writer:
+        for columns in chunks:
+            months = columns["period"].astype(np.int64) - 1970 * 12
+            writer.write_table(
+                pa.table(
+                    [
+                        columns["title"],
+                        columns["author"],
+                        months.astype("datetime64[M]").astype("datetime64[D]"),
+                        columns["views"].astype(np.int64),
+                        columns["likes"].astype(np.int64),
+                        columns["link"],
+                    ],
+                    schema=SCHEMA,
+                )
+            )
+            yield sink.take()
+    yield sink.take()
+
+
+FORMATS = dict(
+    csv=(csv_chunks, "text/csv"),
+    parquet=(parquet_chunks, "application/vnd.apache.parquet"),
+)
+
+
+# URL of the export of a selection
+def export_url(file_format, year=None, author=None, q=None):
+    params = dict(format=file_format, year=year or [], author=author, q=q)
+    return "/export?" + urlencode(
+        {key: value for key, value in params.items() if value is not None},
+        doseq=True,
+    )
+
+
+# Serve /export on the Flask server; `backend` returns the current data
+# backend, which a streaming response keeps using until it is done
+def init_app(server, backend):
+    def export():
+        file_format = request.args.get("format", "csv")
+        if file_format not in FORMATS:
+            abort(400, "format must be csv or parquet")
+        try:
+            year = [int(value) for value in request.args.getlist("year")] or None
+        except ValueError:
+            abort(400, "year must be an integer")
+        if year is not None and len(year) != 2:
+            abort(400, "year takes a first and a last year")
+        if year is not None and year[0] > year[1]:
+            abort(400, "the first year must not be after the last")
+
+        chunks = backend().export(
+            CHUNK_ROWS,
+            year=year,
+            author=request.args.get("author"),
+            query=request.args.get("q"),
+        )
+        serialize, mimetype = FORMATS[file_format]
+        return Response(
+            serialize(chunks),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f'attachment; filename="ted-talks.{file_format}"'
+            },
+        )
+
+    server.add_url_rule("/export", "export", export)
@@ -0,0 +1,235 @@
+import numpy as np
+import plotly.colors
+import plotly.io as pio
+
+from dash import Patch
+
+# The plotly_dark template without the sections of geo, polar, ternary and
+# 3D plots and without defaults for trace types the dashboard never draws.
+# It is most of each figure's payload, so it is trimmed and built only once.
+_dark = pio.templates["plotly_dark"].to_plotly_json()
+TEMPLATE = dict(
+    data={key: _dark["data"][key] for key in ["bar", "heatmap", "scatter"]},
+    layout={
+        key: value
+        for key, value in _dark["layout"].items()
+        if key not in ["geo", "polar", "ternary", "scene", "mapbox"]
+    },
+)
+
+BASE_LAYOUT = dict(
+    plot_bgcolor="rgba(0,0,0,0.1)",
+    paper_bgcolor="rgba(0,0,0,0)",
+    autosize=True,
+    template=TEMPLATE,
+)
+
+REDOR = [
+    [i / (len(plotly.colors.sequential.Redor) - 1), color]
+    for i, color in enumerate(plotly.colors.sequential.Redor)
+]
+
+# Vertical domains of the two rows, as make_subplots lays them out
+_ROW_DOMAINS = [[0.625, 1.0], [0.0, 0.375]]
+
+
+def _axis(title, **kwargs):
+    return dict(title=dict(text=title), showline=True, **kwargs)
+
+
+# Stacked horizontal bars of views and likes per talk
+def top_talks_figure(titles, authors, dates, views, likes):
+    customdata = list(zip(authors, dates))
+    hover = "%{y}<br>author=%{customdata[0]}<br>date=%{customdata[1]}<br>"
+    return dict(
+        data=[
+            dict(
+                type="bar",
+                orientation="h",
+                x=views,
+                y=titles,
+                name="views",
+                showlegend=False,
+                marker=dict(color="indianred"),
+                customdata=customdata,
+                hovertemplate=hover + "views=%{x}<extra></extra>",
+            ),
+            dict(
+                type="bar",
+                orientation="h",
+                x=likes,
+                y=titles,
+                name="likes",
+                marker=dict(color="lightsalmon"),
+                customdata=customdata,
+                hovertemplate=hover + "likes=%{x}<extra></extra>",
+            ),
+        ],
+        layout=dict(
+            BASE_LAYOUT,
+            barmode="stack",
+            xaxis=dict(title=dict(text="views")),
+            yaxis=dict(title=dict(text="title")),
+            margin=dict(t=60),
+        ),
+    )
+
+
+# Views per author, bubble area by video count and colour by likes
+def speakers_figure(authors, views, likes, video_counts, size_max=30):
+    return dict(
+        data=[
+            dict(
+                type="scatter",
+                mode="markers",
+                x=views,
+                y=authors,
+                showlegend=False,
+                marker=dict(
+                    color=likes,
+                    coloraxis="coloraxis",
+                    size=video_counts,
+                    sizemode="area",
+                    sizeref=2.0 * max(video_counts, default=1) / size_max**2,
+                ),
+                hovertemplate="views=%{x}<br>author=%{y}<br>"
+                "video_count=%{marker.size}<br>likes=%{marker.color}<extra></extra>",
+            )
+        ],
+        layout=dict(
+            BASE_LAYOUT,
+            xaxis=_axis("views"),
+            yaxis=_axis("author"),
+            coloraxis=dict(colorbar=dict(title=dict(text="likes")), colorscale=REDOR),
+            legend=dict(itemsizing="trace"),
+            margin=dict(t=60),
+        ),
+    )
+
+
+# Two stacked line charts sharing the same x values. `rows` holds a
+# (subplot title, trace name, y axis title, y values) tuple per chart.
+def time_series_figure(x, rows, x_title, **xaxis):
+    data, layout = [], dict(BASE_LAYOUT, height=720, annotations=[])
+    for i, ((title, name, y_title, y), domain) in enumerate(zip(rows, _ROW_DOMAINS), 1):
+        suffix = "" if i == 1 else str(i)
+        data.append(
+            dict(
+                type="scatter",
+                x=x,
+                y=y,
+                name=name,
+                xaxis=f"x{suffix}",
+                yaxis=f"y{suffix}",
+            )
+        )
+        layout[f"xaxis{suffix}"] = _axis(x_title, anchor=f"y{suffix}", **xaxis)
+        layout[f"yaxis{suffix}"] = _axis(y_title, anchor=f"x{suffix}", domain=domain)
+        layout["annotations"].append(
+            dict(
+                text=title,
+                font=dict(size=16),
+                showarrow=False,
+                x=0.5,
+                xanchor="center",
+                xref="paper",
+                y=domain[1],
+                yanchor="bottom",
+                yref="paper",
+            )
+        )
+    return dict(data=data, layout=layout)
+
+
+# Like-rate histogram drawn as a filled step line, so bins of growing width
+# can sit on a log axis. `edges` holds one more value than `counts`.
+def like_rate_figure(edges, counts):
+    return dict(
+        data=[
+            dict(
+                type="scatter",
+                mode="lines",
+                x=edges,
+                y=np.append(counts, counts[-1:]),
+                line=dict(shape="hv", color="indianred"),
+                fill="tozeroy",
+                showlegend=False,
+                hovertemplate="like rate=%{x:.2%}<br>talks=%{y}<extra></extra>",
+            )
+        ],
+        layout=dict(
+            BASE_LAYOUT,
+            title=dict(text="Like rate"),
+            xaxis=_axis("likes / views", type="log", tickformat=".1%"),
+            yaxis=_axis("talks"),
+        ),
+    )
+
+
+# Talk counts on a grid of log-binned views and likes, blank where empty
+def density_figure(views, likes, counts):
+    return dict(
+        data=[
+            dict(
+                type="heatmap",
+                x=views,
+                y=likes,
+                z=np.where(counts > 0, counts, np.nan),
+                coloraxis="coloraxis",
+                hovertemplate="views≈%{x:.3s}<br>likes≈%{y:.3s}<br>"
+                "talks=%{z}<extra></extra>",
+            )
+        ],
+        layout=dict(
+            BASE_LAYOUT,
+            title=dict(text="Views vs likes"),
+            xaxis=_axis("views", type="log"),
+            yaxis=_axis("likes", type="log"),
+            coloraxis=dict(colorbar=dict(title=dict(text="talks")), colorscale=REDOR),
+        ),
+    )
+
+
+# A line per quantile of the like rate across years. `values` holds a row
+# per year and a column per label.
+def percentiles_figure(years, values, labels):
+    return dict(
+        data=[
+            dict(
+                type="scatter",
+                mode="lines+markers",
+                x=years,
+                y=values[:, i],
+                name=label,
+                hovertemplate="%{x}: %{y:.2%}",
+            )
+            for i, label in enumerate(labels)
+        ],
+        layout=dict(
+            BASE_LAYOUT,
+            title=dict(text="Like rate percentiles"),
+            xaxis=_axis("year"),
+            yaxis=_axis("likes / views", tickformat=".1%"),
+            hovermode="x unified",
+        ),
+    )
+
+
+# Patch assigning only the given trace and layout properties of `fig`, for
+# updates that keep the figure's structure (same traces, axes and styling).
+# Paths are dotted, e.g. "marker.size" or "xaxis.tickvals".
+def patch_figure(fig, trace_paths, layout_paths=()):
+    patch = Patch()
+    for i, trace in enumerate(fig["data"]):
+        for path in trace_paths:
+            _assign(patch["data"][i], trace, path)
+    for path in layout_paths:
+        _assign(patch["layout"], fig["layout"], path)
+    return patch
+
+
+def _assign(target, source, path):
+    *parents, key = path.split(".")
+    for parent in parents:
+        target, source = target[parent], source[parent]
+    target[key] = source[key]
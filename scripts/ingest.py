@@ -0,0 +1,73 @@
+# Live ingestion: follow the talks CSV file for appended rows, or a drop
+# directory for new CSV files, and hand the new talks to a callback in
+# batches. Polling keeps this free of extra dependencies. Files should be
+# complete when they appear in a drop directory (write them elsewhere, then
+# move them in).
+
+import io
+import logging
+import os
+import threading
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class Follower(threading.Thread):
+    def __init__(self, path, ingest, interval=5.0):
+        super().__init__(daemon=True)
+        self.path = path
+        self.ingest = ingest
+        self.interval = interval
+        self.stopped = threading.Event()
+        # The data path holds none of the dropped talks, so the first poll
+        # ingests every file already in a drop directory. A followed file is
+        # the data file itself, followed from its current end.
+        if os.path.isdir(path):
+            self.seen = set()
+        else:
+            self.offset = os.path.getsize(path)
+            self.columns = pd.read_csv(path, nrows=0).columns
+
+    def _csv_files(self):
+        return sorted(name for name in os.listdir(self.path) if name.endswith(".csv"))
+
+    # Frames of the talks added since the previous poll
+    def poll(self):
+        if os.path.isdir(self.path):
+            for name in self._csv_files():
+                if name not in self.seen:
+                    self.seen.add(name)
+                    yield pd.read_csv(os.path.join(self.path, name))
+            return
+
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            logger.warning("%s was truncated, following it from its end", self.path)
+            self.offset = size
+        if size <= self.offset:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        # A partly written last line is left for the next poll
+        end = data.rfind(b"\n") + 1
+        if end:
+            self.offset += end
+            yield pd.read_csv(io.BytesIO(data[:end]), names=self.columns, header=None)
+
+    # Polls right away, then every `interval` seconds
+    def run(self):
+        while True:
+            try:
+                for df in self.poll():
+                    self.ingest(df)
+            except Exception:
+                logger.exception("ingesting talks from %s failed", self.path)
+            if self.stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,441 @@
+# Load test the dashboard server with concurrent simulated users. Run from the
+# repository root, e.g.
+#   python scripts/loadtest.py --configs 1x1 4x1 2x4 --users 50 200
+# Each "WxT" configuration starts gunicorn (as wsgi.py describes) with W
+# workers of T threads each on a free local port; --url tests a running
+# server instead. Users load the page, then drag year sliders, edit top-N
+# inputs and switch speakers with think times in between, posting to
+# /_dash-update-component what the browser would: every callback an edited
+# property is an input of, with the other inputs and states at their current
+# values. Throughput, per-callback latency percentiles and error rates are
+# printed and written to a JSON file.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+from app import DATA_PATH, YEAR_SLIDERS
+
+NUMBER_INPUTS = [
+    "talks-number",
+    "speakers-number",
+    "talks-per-speaker-number",
+    "talk-search-number",
+]
+SPEAKER_DROPDOWN = "talks-per-speaker-dropdown"
+
+# Relative frequency of each interaction
+ACTIONS = dict(drag=0.5, top_n=0.3, speaker=0.2)
+
+
+# Minimal asyncio HTTP/1.1 client keeping idle keep-alive connections for
+# reuse, so concurrent requests of a user each get a connection, as in a
+# browser
+class Client:
+    def __init__(self, url):
+        url = urllib.parse.urlsplit(url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.idle = []
+
+    # Like a browser, a request on an idle connection the server has closed
+    # meanwhile is sent again on a new one
+    async def request(self, method, path, body=b""):
+        while self.idle:
+            reader, writer = self.idle.pop()
+            try:
+                return await self._send(reader, writer, method, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        return await self._send(reader, writer, method, path, body)
+
+    async def _send(self, reader, writer, method, path, body):
+        try:
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                "\r\n".encode() + body
+            )
+            status, headers, data = await _read_response(reader)
+        except BaseException:
+            writer.close()
+            raise
+        if headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            self.idle.append((reader, writer))
+        return status, data
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed by the server")
+    status = int(status_line.split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    # These never have a body, and Dash answers PreventUpdate with a 204
+    # without a Content-Length
+    if status < 200 or status in (204, 304):
+        data = b""
+    elif "content-length" in headers:
+        data = await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        await reader.readline()
+        data = b"".join(chunks)
+    else:
+        data = await reader.read()
+        headers["connection"] = "close"
+    return status, headers, data
+
+
+# "..a.x...b.y.." or "a.x" as [(id, property)] pairs
+def _outputs(spec):
+    parts = spec[2:-2].split("...") if spec.startswith("..") else [spec]
+    return [tuple(part.rsplit(".", 1)) for part in parts]
+
+
+# Components of the served layout by id
+def _components(node, found):
+    if isinstance(node, list):
+        for child in node:
+            _components(child, found)
+    elif isinstance(node, dict) and "props" in node:
+        props = node["props"]
+        if "id" in props:
+            found[props["id"]] = props
+        _components(props.get("children"), found)
+    return found
+
+
+# The callbacks and initial component properties the dashboard serves
+def read_app(url):
+    def get(path):
+        with urllib.request.urlopen(url + path) as response:
+            return json.load(response)
+
+    callbacks = [
+        dict(
+            name=",".join(f"{id}.{prop}" for id, prop in _outputs(dep["output"])),
+            output=dep["output"],
+            outputs=_outputs(dep["output"]),
+            inputs=[(item["id"], item["property"]) for item in dep["inputs"]],
+            state=[(item["id"], item["property"]) for item in dep["state"]],
+        )
+        for dep in get("/_dash-dependencies")
+        if not dep.get("clientside_function")
+    ]
+    return callbacks, _components(get("/_dash-layout"), {})
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, name, seconds, ok):
+        self.latencies.setdefault(name, []).append(seconds)
+        self.errors[name] = self.errors.get(name, 0) + (not ok)
+
+    def report(self, elapsed):
+        callbacks = {}
+        for name, latencies in sorted(self.latencies.items()):
+            latencies = np.array(latencies) * 1e3
+            callbacks[name] = dict(
+                requests=len(latencies),
+                requests_per_second=len(latencies) / elapsed,
+                error_rate=self.errors[name] / len(latencies),
+                latency_ms={
+                    f"p{q}": float(np.percentile(latencies, q)) for q in [50, 95, 99]
+                },
+            )
+        requests = sum(len(latencies) for latencies in self.latencies.values())
+        return dict(
+            seconds=elapsed,
+            requests=requests,
+            requests_per_second=requests / elapsed,
+            error_rate=sum(self.errors.values()) / max(requests, 1),
+            callbacks=callbacks,
+        )
+
+
+# A simulated user with its own copy of the page's input values
+class User:
+    def __init__(self, url, callbacks, components, stats, rng, think):
+        self.client = Client(url)
+        self.callbacks = callbacks
+        self.stats = stats
+        self.rng = rng
+        self.think = think
+        self.sent = {}
+        self.values = {
+            (id, prop): components[id].get(prop)
+            for callback in callbacks
+            for id, prop in callback["inputs"] + callback["state"]
+        }
+        self.bounds = {
+            slider: (components[slider]["min"], components[slider]["max"])
+            for slider in YEAR_SLIDERS
+        }
+        self.speakers = [
+            option["value"] for option in components[SPEAKER_DROPDOWN]["options"]
+        ]
+
+    async def call(self, callback, changed):
+        body = dict(
+            output=callback["output"],
+            outputs=[dict(id=id, property=prop) for id, prop in callback["outputs"]],
+            inputs=[
+                dict(id=id, property=prop, value=self.values[id, prop])
+                for id, prop in callback["inputs"]
+            ],
+            state=[
+                dict(id=id, property=prop, value=self.values[id, prop])
+                for id, prop in callback["state"]
+            ],
+            changedPropIds=[f"{id}.{prop}" for id, prop in changed],
+        )
+        if len(callback["outputs"]) == 1:
+            body["outputs"] = body["outputs"][0]
+
+        self.sent[callback["name"]] = sent = self.sent.get(callback["name"], 0) + 1
+        start = time.perf_counter()
+        try:
+            status, data = await self.client.request(
+                "POST", "/_dash-update-component", json.dumps(body).encode()
+            )
+        except (OSError, asyncio.IncompleteReadError):
+            status, data = None, b""
+        self.stats.add(
+            callback["name"], time.perf_counter() - start, status in (200, 204)
+        )
+        if status == 200 and self.sent[callback["name"]] == sent:
+            self.apply(json.loads(data).get("response", {}))
+
+    # Keep the input values the server set (e.g. clamped top-N numbers). As
+    # in the browser, responses to superseded requests are ignored.
+    def apply(self, response):
+        for id, props in response.items():
+            for prop, value in props.items():
+                if (id, prop) in self.values and not isinstance(value, dict):
+                    self.values[id, prop] = value
+
+    # Set a property and fire every callback it is an input of, concurrently
+    async def set(self, id, prop, value):
+        self.values[id, prop] = value
+        await asyncio.gather(
+            *(
+                self.call(callback, [(id, prop)])
+                for callback in self.callbacks
+                if (id, prop) in callback["inputs"]
+            )
+        )
+
+    async def pause(self, mean):
+        await asyncio.sleep(self.rng.exponential(mean))
+
+    # Load the page and its own layout, which holds a new page id, then fire
+    # the initial callbacks
+    async def load(self):
+        await self.client.request("GET", "/")
+        _, data = await self.client.request("GET", "/_dash-layout")
+        components = _components(json.loads(data), {})
+        for id, prop in self.values:
+            self.values[id, prop] = components[id].get(prop)
+        await asyncio.gather(*(self.call(callback, []) for callback in self.callbacks))
+
+    # Successive edits of a property `pause` seconds apart on average. Like
+    # the browser, an edit does not wait for the responses to the previous.
+    async def edit(self, id, prop, values, pause):
+        pending = []
+        for value in values:
+            pending.append(asyncio.ensure_future(self.set(id, prop, value)))
+            await self.pause(pause)
+        await asyncio.gather(*pending)
+
+    # A few slider releases in quick succession, each moving one end
+    async def drag(self):
+        slider = self.rng.choice(YEAR_SLIDERS)
+        year_min, year_max = self.bounds[slider]
+        first, last = self.values[slider, "value"]
+        values = []
+        for _ in range(self.rng.integers(1, 5)):
+            if self.rng.random() < 0.5:
+                first = int(np.clip(first + self.rng.integers(-3, 4), year_min, last))
+            else:
+                last = int(np.clip(last + self.rng.integers(-3, 4), first, year_max))
+            values.append([first, last])
+        await self.edit(slider, "value", values, 0.2)
+
+    # Type a number digit by digit: the input fires on every keystroke
+    async def top_n(self):
+        digits = str(self.rng.integers(1, 60))
+        values = [int(digits[:i]) for i in range(1, len(digits) + 1)]
+        await self.edit(self.rng.choice(NUMBER_INPUTS), "value", values, 0.15)
+
+    # Type the start of a speaker's name into the search, then pick them
+    async def speaker(self):
+        name = self.rng.choice(self.speakers)
+        values = [name[:i] for i in range(1, min(len(name), 4) + 1)]
+        await self.edit(SPEAKER_DROPDOWN, "search_value", values, 0.15)
+        await self.set(SPEAKER_DROPDOWN, "value", name)
+
+    async def run(self, deadline):
+        actions, weights = zip(*ACTIONS.items())
+        weights = np.array(weights) / sum(weights)
+        try:
+            await self.load()
+            while time.perf_counter() < deadline:
+                await self.pause(self.think)
+                await getattr(self, self.rng.choice(actions, p=weights))()
+        finally:
+            self.client.close()
+
+
+async def load_test(url, users, seconds, think, seed=0):
+    callbacks, components = read_app(url)
+    stats = Stats()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            User(
+                url,
+                callbacks,
+                components,
+                stats,
+                np.random.default_rng([seed, i]),
+                think,
+            ).run(start + seconds)
+            for i in range(users)
+        )
+    )
+    return stats.report(time.perf_counter() - start)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Start gunicorn with `workers` x `threads` and wait until it serves
+def start_server(data_path, workers, threads, timeout=120):
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--pythonpath",
+            "scripts",
+            "--preload",
+            f"--workers={workers}",
+            f"--threads={threads}",
+            f"--bind=127.0.0.1:{port}",
+            "--log-level=warning",
+            "wsgi:server",
+        ],
+        env=dict(os.environ, TED_TALKS_DATA=data_path),
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("gunicorn exited while starting")
+        try:
+            urllib.request.urlopen(url + "/_dash-layout").close()
+            return server, url
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start serving in time")
+
+
+def print_report(label, users, report):
+    print(
+        f"{label:>8} {users:>5} users  {report['requests_per_second']:8.1f} req/s"
+        f"  errors {report['error_rate']:.2%}"
+    )
+    for name, callback in report["callbacks"].items():
+        latency = callback["latency_ms"]
+        print(
+            f"    {name[:60]:<60} {callback['requests']:>7}"
+            f"  p50 {latency['p50']:8.1f}  p95 {latency['p95']:8.1f}"
+            f"  p99 {latency['p99']:8.1f} ms  errors {callback['error_rate']:.2%}"
+        )
+
+
+def run(args):
+    if args.url:
+        servers = [("external", None, args.url)]
+    else:
+        servers = []
+        for config in args.configs:
+            workers, threads = map(int, config.split("x"))
+            servers.append((config, (workers, threads), None))
+
+    results = []
+    for label, config, url in servers:
+        server = None
+        if config:
+            server, url = start_server(args.data, *config)
+        try:
+            for users in args.users:
+                report = asyncio.run(
+                    load_test(url, users, args.seconds, args.think, args.seed)
+                )
+                print_report(label, users, report)
+                results.append(dict(config=label, users=users, **report))
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=["1x1", "4x1", "1x4", "2x4"],
+        help="gunicorn WORKERSxTHREADS configurations to compare",
+    )
+    parser.add_argument("--url", help="test this running server instead")
+    parser.add_argument("--data", default=DATA_PATH, help="dataset to serve")
+    parser.add_argument("--users", type=int, nargs="+", default=[50])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest.json")
+    args = parser.parse_args()
+
+    report = dict(
+        created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        seconds=args.seconds,
+        think=args.think,
+        results=run(args),
+    )
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
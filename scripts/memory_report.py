@@ -0,0 +1,67 @@
+# Compare the resident size of the talks table before and after the compact
+# representation on a synthetic dataset. Run from the repository root, e.g.
+#   python scripts/memory_report.py --rows 1000000
+# Each representation is loaded in a fresh process so RSS deltas don't mix.
+
+import argparse
+import datetime as dt
+import multiprocessing
+import os
+
+import pandas as pd
+
+from benchmark import generate_dataset
+from snapshot import read_talks
+
+
+def resident_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+# The frame the dashboard used to keep: default dtypes and datetime64 dates
+def load_frame(path):
+    df = pd.read_csv(path).dropna()
+    df["date"] = pd.to_datetime(df["date"], format="%B %Y")
+    df = df[df["date"] >= dt.datetime(2000, 1, 1)]
+    return df, int(df.memory_usage(deep=True).sum())
+
+
+def load_table(path):
+    table = read_talks(path)
+    return table, table.nbytes
+
+
+def measure(loader, path, queue):
+    before = resident_bytes()
+    data, nbytes = loader(path)
+    queue.put((resident_bytes() - before, nbytes))
+
+
+def run(loader, path):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(loader, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--data-dir", default="data/synthetic")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f"synthetic-{args.rows}.csv")
+    if not os.path.exists(path):
+        generate_dataset(path, args.rows)
+    read_talks(path)
+
+    print(f"{args.rows} rows")
+    print(f"{'':<12}{'resident MB':>14}{'data MB':>12}")
+    for name, loader in [("before", load_frame), ("after", load_table)]:
+        rss, nbytes = run(loader, path)
+        print(f"{name:<12}{rss / 2**20:>14.1f}{nbytes / 2**20:>12.1f}")
@@ -0,0 +1,169 @@
+import functools
+import logging
+import threading
+import time
+
+from collections import defaultdict
+from flask import Response, request
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+BYTES_BUCKETS = [2**i for i in range(10, 25, 2)]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+# Per-callback timings split into phases: data query and figure construction
+# (marked by lap() calls inside the callbacks), JSON serialization (the time
+# Dash spends after the callback returns) and total. Exposed in Prometheus
+# text format on /metrics of the Flask server.
+class Metrics:
+    def __init__(self, slow_seconds=None):
+        self.slow_seconds = slow_seconds
+        self.seconds = defaultdict(lambda: Histogram(SECONDS_BUCKETS))
+        self.payload_bytes = defaultdict(lambda: Histogram(BYTES_BUCKETS))
+        self.in_flight = defaultdict(int)
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _observe(self, callback, phase, seconds):
+        with self._lock:
+            self.seconds[callback, phase].observe(seconds)
+
+    # Record the time since the callback started (or since the previous lap)
+    # as `phase` of the callback running on this thread
+    def lap(self, phase):
+        callback = getattr(self._local, "callback", None)
+        if callback is None:
+            return
+        now = time.perf_counter()
+        self._observe(callback, phase, now - self._local.lap)
+        self._local.lap = now
+
+    # `func` wrapped to record its laps for the callback running on this
+    # thread when it runs on another one. The wait until it starts there is
+    # the "queue" phase.
+    def carry(self, func):
+        callback = getattr(self._local, "callback", None)
+        submitted = time.perf_counter()
+
+        def wrapper():
+            self._local.callback = callback
+            self._local.lap = submitted
+            self.lap("queue")
+            try:
+                return func()
+            finally:
+                self._local.callback = None
+
+        return wrapper
+
+    # Export the values of `stats()` as `prefix`_<key> gauges, except for the
+    # `counters` keys, which only ever increase: those as <key>_total counters
+    def collect(self, prefix, stats, counters=()):
+        self.collectors.append((prefix, stats, set(counters)))
+
+    def instrument(self, func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            name = func.__name__
+            with self._lock:
+                self.in_flight[name] += 1
+            self._local.callback = name
+            self._local.start = self._local.lap = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                end = time.perf_counter()
+                self._local.callback = None
+                self._local.finished = (name, end)
+                with self._lock:
+                    self.in_flight[name] -= 1
+                self._observe(name, "callback", end - self._local.start)
+                if self.slow_seconds and end - self._local.start > self.slow_seconds:
+                    logger.warning(
+                        "slow callback %s took %.3fs with inputs %r",
+                        name,
+                        end - self._local.start,
+                        args,
+                    )
+
+        return wrapper
+
+    def _after_request(self, response):
+        finished = getattr(self._local, "finished", None)
+        self._local.finished = None
+        if finished is None or not request.path.endswith("_dash-update-component"):
+            return response
+
+        name, end = finished
+        self._observe(name, "serialize", time.perf_counter() - end)
+        self._observe(name, "total", time.perf_counter() - self._local.start)
+        with self._lock:
+            self.payload_bytes[name].observe(response.content_length or 0)
+        return response
+
+    def render(self):
+        lines = [
+            "# HELP dash_callback_seconds Callback wall time by phase",
+            "# TYPE dash_callback_seconds histogram",
+        ]
+        with self._lock:
+            for (callback, phase), histogram in sorted(self.seconds.items()):
+                labels = f'callback="{callback}",phase="{phase}"'
+                lines.extend(histogram.lines("dash_callback_seconds", labels))
+
+            lines.append("# HELP dash_callback_payload_bytes Response payload size")
+            lines.append("# TYPE dash_callback_payload_bytes histogram")
+            for callback, histogram in sorted(self.payload_bytes.items()):
+                labels = f'callback="{callback}"'
+                lines.extend(histogram.lines("dash_callback_payload_bytes", labels))
+
+            lines.append("# HELP dash_callbacks_in_flight Callbacks currently running")
+            lines.append("# TYPE dash_callbacks_in_flight gauge")
+            for callback, count in sorted(self.in_flight.items()):
+                lines.append(
+                    f'dash_callbacks_in_flight{{callback="{callback}"}} {count}'
+                )
+
+        for prefix, stats, counters in self.collectors:
+            for key, value in stats().items():
+                if key in counters:
+                    name, kind = f"{prefix}_{key}_total", "counter"
+                else:
+                    name, kind = f"{prefix}_{key}", "gauge"
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def init_app(self, server):
+        server.after_request(self._after_request)
+        server.add_url_rule(
+            "/metrics",
+            "metrics",
+            lambda: Response(self.render(), mimetype="text/plain; version=0.0.4"),
+        )
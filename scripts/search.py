@@ -0,0 +1,221 @@
+import copy
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+# Lowercase, strip accents and surrounding quotes so that "José" matches
+# "jose"; non-ASCII punctuation, spaces and control characters become spaces
+def normalize(text):
+    text = text.strip(" '").casefold()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(
+        " " if unicodedata.category(c)[0] in "CPZ" else c
+        for c in text
+        if not unicodedata.combining(c)
+    )
+
+
+# Word-suffix keys of the names from `start` on, with their codes
+def _suffixes(names, start):
+    keys, codes = [], []
+    for code in range(start, len(names)):
+        words = normalize(names[code]).split()
+        for i in range(len(words)):
+            keys.append(" ".join(words[i:]))
+            codes.append(code)
+    return np.array(keys, dtype=str), np.array(codes, dtype=np.int64)
+
+
+# Prefix index over normalized author names. Every name is keyed by each of
+# its word-suffixes ("alex gendler" and "gendler"), so typing a first or last
+# name finds it by binary search over one sorted array.
+class AuthorSearch:
+    def __init__(self, names, counts):
+        self.names = names
+        self.counts = np.asarray(counts)
+        keys, codes = _suffixes(names, 0)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.codes = codes[order]
+        self.top_codes = np.argsort(-self.counts, kind="stable")
+
+    # A new index over `names`, which extends the indexed names, with
+    # updated talk counts
+    def extend(self, names, counts):
+        search = copy.copy(self)
+        search.names = names
+        search.counts = np.asarray(counts)
+        keys, codes = _suffixes(names, len(self.names))
+        order = np.argsort(keys, kind="stable")
+        positions = np.searchsorted(self.keys, keys[order], side="right")
+        search.keys = np.insert(
+            self.keys.astype(np.result_type(self.keys, keys)), positions, keys[order]
+        )
+        search.codes = np.insert(self.codes, positions, codes[order])
+        search.top_codes = np.argsort(-search.counts, kind="stable")
+        return search
+
+    # Codes of up to `limit` authors matching the query, most talks first
+    def search(self, query, limit=20):
+        query = " ".join(normalize(query).split())
+        if not query:
+            return self.top_codes[:limit]
+
+        lo = np.searchsorted(self.keys, query)
+        hi = np.searchsorted(self.keys, query + "\U0010ffff")
+        matches = np.unique(self.codes[lo:hi])
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-self.counts[matches], limit)[:limit]]
+        return matches[np.argsort(-self.counts[matches], kind="stable")]
+
+    # Dropdown options for the matching authors
+    def options(self, query, limit=20):
+        return [
+            dict(label=self.names[code], value=self.names[code])
+            for code in self.search(query, limit)
+        ]
+
+
+# Words are runs of letters, digits and non-ASCII characters. Splitting on a
+# byte translation table keeps tokenizing a whole catalogue in C.
+SEPARATORS = bytes(c if chr(c).isalnum() or c >= 128 else 32 for c in range(256))
+
+
+def tokenize(text):
+    return [
+        word.decode() for word in normalize(text).encode().translate(SEPARATORS).split()
+    ]
+
+
+# (token, prefix) pairs of a search query. The last word, and any word ending
+# in "*", matches as a prefix.
+def query_terms(query):
+    words = query.split()
+    terms = []
+    for i, word in enumerate(words):
+        tokens = tokenize(word)
+        prefix = word.endswith("*") or i == len(words) - 1
+        terms += [
+            (token, prefix and j == len(tokens) - 1) for j, token in enumerate(tokens)
+        ]
+    return terms
+
+
+# Words of the talks' titles and link slugs: the row and vocabulary position
+# of every occurrence, and the vocabulary. The talks are joined into one
+# buffer with a record separator between them and split into words and
+# separator markers; the running marker count is each word's row.
+def _occurrences(titles, links):
+    text = "\x1e".join(
+        normalize(f"{title} {link.rsplit('/', 1)[-1]}")
+        for title, link in zip(titles, links)
+    )
+    separators = bytearray(SEPARATORS)
+    separators[0x1E] = 0x1E
+    words = np.array(
+        text.encode().translate(separators).replace(b"\x1e", b" \x1e ").split(),
+        dtype=object,
+    )
+    markers = words == b"\x1e"
+    rows = np.cumsum(markers)[~markers]
+    tokens, words = pd.factorize(words[~markers])
+    return rows, tokens, np.array([word.decode() for word in words], dtype=str)
+
+
+# Inverted index over the words of talk titles and link slugs. Rows are
+# renumbered by view rank, so every posting list is a sorted int32 array whose
+# order is also the ranking: intersecting lists and taking the head yields
+# the most viewed matches without a sort.
+class TalkSearch:
+    def __init__(self, titles, links, views, years):
+        views = np.asarray(views, dtype=np.int64)
+        self.order = np.argsort(-views, kind="stable")
+        self.views = views[self.order]
+        self.years = np.asarray(years)[self.order]
+
+        rows, tokens, words = _occurrences(titles, links)
+        ranks = np.empty(len(self.order), dtype=np.int64)
+        ranks[self.order] = np.arange(len(self.order))
+        ranks = ranks[rows]
+
+        word_order = np.argsort(words, kind="stable")
+        self.words = words[word_order]
+        word_ids = np.empty(len(words), dtype=np.int64)
+        word_ids[word_order] = np.arange(len(words))
+
+        # Unique (word, rank) keys sorted word-major are the posting lists
+        n = len(self.order)
+        keys = np.unique(word_ids[tokens] * n + ranks)
+        self.postings = (keys % n).astype(np.int32)
+        self.offsets = np.searchsorted(keys // n, np.arange(len(words) + 1))
+
+    # A new index with the talks added. Existing rows are renumbered by
+    # shifting their ranks and posting lists are merged, so only the new
+    # titles are tokenized.
+    def extend(self, titles, links, views, years):
+        n, m = len(self.order), len(views)
+        views = np.asarray(views, dtype=np.int64)
+        index = copy.copy(self)
+
+        # New talks go after existing talks with the same views; every
+        # existing rank moves down by the number of talks inserted above it
+        order = np.argsort(-views, kind="stable")
+        positions = np.searchsorted(-self.views, -views[order], side="right")
+        index.order = np.insert(self.order, positions, n + order)
+        index.views = np.insert(self.views, positions, views[order])
+        index.years = np.insert(self.years, positions, np.asarray(years)[order])
+        old_ranks = np.arange(n) + np.searchsorted(positions, np.arange(n), "right")
+        new_ranks = np.empty(m, dtype=np.int64)
+        new_ranks[order] = positions + np.arange(m)
+
+        rows, tokens, words = _occurrences(titles, links)
+        index.words = np.union1d(self.words, words)
+        word_ids = np.searchsorted(index.words, self.words)
+        total = n + m
+        keys = (
+            np.repeat(word_ids, np.diff(self.offsets)) * total
+            + old_ranks[self.postings]
+        )
+        new_keys = np.unique(
+            np.searchsorted(index.words, words)[tokens] * total + new_ranks[rows]
+        )
+        keys = np.insert(keys, np.searchsorted(keys, new_keys), new_keys)
+        index.postings = (keys % total).astype(np.int32)
+        index.offsets = np.searchsorted(keys // total, np.arange(len(index.words) + 1))
+        return index
+
+    # Ranks of talks containing the word (or, with prefix, any word starting
+    # with it)
+    def _ranks(self, word, prefix):
+        lo = np.searchsorted(self.words, word)
+        if not prefix:
+            if lo == len(self.words) or self.words[lo] != word:
+                return self.postings[:0]
+            return self.postings[self.offsets[lo] : self.offsets[lo + 1]]
+
+        hi = np.searchsorted(self.words, word + "\U0010ffff")
+        if hi - lo == 1:
+            return self.postings[self.offsets[lo] : self.offsets[hi]]
+        return np.unique(self.postings[self.offsets[lo] : self.offsets[hi]])
+
+    # Rows of the `num` most viewed talks matching every term of the query,
+    # optionally within a year range
+    def search(self, query, num, year=None):
+        lists = [self._ranks(token, prefix) for token, prefix in query_terms(query)]
+
+        if lists:
+            lists.sort(key=len)
+            ranks = lists[0]
+            for other in lists[1:]:
+                ranks = np.intersect1d(ranks, other, assume_unique=True)
+        else:
+            ranks = np.arange(len(self.order))
+        if year is not None:
+            ranks = ranks[
+                (self.years[ranks] >= year[0]) & (self.years[ranks] <= year[1])
+            ]
+        return self.order[ranks[:num]]
@@ -0,0 +1,192 @@
+import datetime as dt
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from store import StringStore, TalksTable
+
+# Bump when the snapshot layout changes so stale snapshots get rebuilt
+SNAPSHOT_VERSION = 3
+
+
+# Directory holding the binary snapshot of a CSV file
+def snapshot_dir(path):
+    head, tail = os.path.split(path)
+    return os.path.join(head, f".{os.path.splitext(tail)[0]}.snapshot")
+
+
+# Author of talks listed without one
+UNKNOWN_AUTHOR = "Unknown"
+
+
+# Trimmed text column, missing values as empty strings
+def _text(column):
+    return column.astype("string").str.strip().fillna("")
+
+
+# Author names with whitespace collapsed and surrounding quotes stripped,
+# normalized once per distinct name
+def _author_names(column):
+    codes, names = pd.factorize(column)
+    names = (
+        _text(pd.Series(names))
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip(" '\"")
+        .replace("", UNKNOWN_AUTHOR)
+    )
+    # Missing names have code -1, the appended UNKNOWN_AUTHOR
+    names = np.append(names.to_numpy(dtype=object), UNKNOWN_AUTHOR)
+    return pd.Series(names[codes], index=column.index)
+
+
+# Normalize and validate a raw frame in one vectorized pass: trim text,
+# collapse the whitespace and strip the quotes around author names, parse
+# dates from 2000 on and whole counts with 0 <= likes <= views < 2**32. Rows
+# failing a check are dropped (a missing author only gets UNKNOWN_AUTHOR),
+# and of several rows with the same link the first is kept.
+def clean_talks(df):
+    title, link = _text(df["title"]), _text(df["link"])
+    author = _author_names(df["author"])
+    date = pd.to_datetime(_text(df["date"]), format="%B %Y", errors="coerce")
+    views = pd.to_numeric(df["views"], errors="coerce")
+    likes = pd.to_numeric(df["likes"], errors="coerce")
+
+    valid = (
+        title.ne("")
+        & link.ne("")
+        & (date >= dt.datetime(2000, 1, 1))
+        & (views % 1 == 0)
+        & (likes % 1 == 0)
+        & (likes >= 0)
+        & (likes <= views)
+        & (views < 2**32)
+    )
+    valid &= ~link.where(valid).duplicated()
+    df = pd.DataFrame(
+        dict(title=title, author=author, date=date, views=views, likes=likes, link=link)
+    )[valid]
+    return df.astype(
+        dict(title=object, author=object, link=object, views=np.int64, likes=np.int64)
+    )
+
+
+# Parse and clean the CSV once
+def parse_csv(path):
+    return clean_talks(pd.read_csv(path)).reset_index(drop=True)
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Write a file through `write(f)` under a temporary name of this process and
+# move it into place. Workers started without --preload may rebuild one
+# snapshot at the same time; each then writes its own temporary files, and
+# readers only ever see complete ones.
+def _write_file(path, write, mode="wb"):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _save(directory, name, array):
+    _write_file(os.path.join(directory, f"{name}.npy"), lambda f: np.save(f, array))
+
+
+def write_snapshot(table, directory, source):
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, "meta.json")
+    # Another process may be rebuilding the snapshot too
+    try:
+        os.remove(meta_path)
+    except FileNotFoundError:
+        pass
+
+    names = StringStore.from_strings(table.names)
+    for name, strings in [
+        ("title", table.title),
+        ("link", table.link),
+        ("names", names),
+    ]:
+        _save(directory, f"{name}.data", strings.data)
+        _save(directory, f"{name}.offsets", strings.offsets)
+    for name in ["author", "period", "views", "likes"]:
+        _save(directory, name, getattr(table, name))
+
+    stat = os.stat(source)
+    meta = dict(
+        version=SNAPSHOT_VERSION,
+        rows=len(table),
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        sha256=_file_hash(source),
+    )
+    _write_file(meta_path, lambda f: json.dump(meta, f), "w")
+
+
+def read_snapshot(directory, mmap_mode=None):
+    def load(name):
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    names = StringStore(load("names.data"), load("names.offsets"))
+    return TalksTable(
+        title=StringStore(load("title.data"), load("title.offsets")),
+        link=StringStore(load("link.data"), load("link.offsets")),
+        author=load("author"),
+        names=pd.Index(names[:]),
+        period=load("period"),
+        views=load("views"),
+        likes=load("likes"),
+    )
+
+
+# Whether the snapshot was built from the current contents of `source`. The
+# file hash is only computed when the modification time or size changed.
+def snapshot_is_fresh(directory, source):
+    meta_path = os.path.join(directory, "meta.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return False
+
+    stat = os.stat(source)
+    if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+        return True
+    if meta["size"] != stat.st_size or meta["sha256"] != _file_hash(source):
+        return False
+
+    meta["mtime_ns"] = stat.st_mtime_ns
+    _write_file(meta_path, lambda f: json.dump(meta, f), "w")
+    return True
+
+
+# Load the talks table, from the binary snapshot when it is up to date and
+# from the CSV (regenerating the snapshot) otherwise. With mmap_mode="r" the
+# columns are read-only memory maps of the snapshot files, so every worker
+# process on the host shares one copy through the page cache.
+def read_talks(path, mmap_mode=None):
+    directory = snapshot_dir(path)
+    if snapshot_is_fresh(directory, path):
+        return read_snapshot(directory, mmap_mode)
+
+    table = TalksTable.from_frame(parse_csv(path))
+    try:
+        write_snapshot(table, directory, path)
+    except OSError:
+        return table
+    return read_snapshot(directory, mmap_mode) if mmap_mode else table
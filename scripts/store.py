@@ -0,0 +1,756 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from search import AuthorSearch, TalkSearch, query_terms
+
+MONTH_ABBR = np.array(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+)
+
+
+# "%b, %Y" labels of integer period codes
+def period_labels(period):
+    return np.char.add(
+        np.char.add(MONTH_ABBR[period % 12], ", "), (period // 12).astype(str)
+    )
+
+
+# Like-rate (likes / views) sketch bins: bin i holds rates in
+# (RATE_MIN * RATE_GAMMA ** (i - 1), RATE_MIN * RATE_GAMMA ** i], so any rate,
+# and any quantile read from the bins, is known within RATE_ACCURACY. Rates
+# up to RATE_MIN share bin 0 and rates above 1 the last bin.
+RATE_ACCURACY = 0.01
+RATE_GAMMA = (1 + RATE_ACCURACY) / (1 - RATE_ACCURACY)
+RATE_MIN = 1e-5
+RATE_BINS = int(np.ceil(np.log(1 / RATE_MIN) / np.log(RATE_GAMMA))) + 1
+
+# Views and likes are binned by log10 in steps of COUNT_STEP
+COUNT_STEP = 0.2
+COUNT_BINS = 50
+
+
+def rate_bins(views, likes):
+    rate = np.maximum(likes / np.maximum(views, 1), RATE_MIN)
+    bins = np.ceil(np.log(rate / RATE_MIN) / np.log(RATE_GAMMA))
+    return np.minimum(bins, RATE_BINS - 1).astype(np.int64)
+
+
+# Lower edges of the like-rate bins
+def rate_edges(bins):
+    return RATE_MIN * RATE_GAMMA ** (np.asarray(bins) - 1.0)
+
+
+def count_bins(counts):
+    bins = np.floor(np.log10(np.maximum(counts, 1)) / COUNT_STEP)
+    return np.minimum(bins, COUNT_BINS - 1).astype(np.int64)
+
+
+# Integer period codes (year * 12 + month - 1) of a datetime column
+def period_codes(dates):
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.int32)
+
+
+# Sort key of rows ordered by group, then by views (descending)
+def _group_views_key(groups, views):
+    return groups.astype(np.int64) * 2**32 + (2**32 - 1 - views.astype(np.int64))
+
+
+# Slice of per-year partitions covered by a [first, last] year range
+def year_slice(year, year_min, year_max):
+    start = min(max(year[0], year_min), year_max + 1) - year_min
+    stop = min(year[1], year_max) - year_min + 1
+    return slice(start, max(start, stop))
+
+
+# Variable-length strings kept as one UTF-8 byte buffer plus row offsets.
+# Only the rows that are displayed ever get decoded.
+class StringStore:
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [value.encode() for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, rows):
+        if isinstance(rows, slice):
+            rows = range(*rows.indices(len(self)))
+        data, offsets = self.data, self.offsets
+        return np.array(
+            [
+                data[offsets[row] : offsets[row + 1]].tobytes().decode()
+                for row in np.atleast_1d(rows)
+            ],
+            dtype=object,
+        )
+
+    # A new store with the values appended
+    def extend(self, values):
+        more = StringStore.from_strings(values)
+        return StringStore(
+            np.concatenate((self.data, more.data)),
+            np.concatenate((self.offsets, more.offsets[1:] + self.offsets[-1])),
+        )
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.offsets.nbytes
+
+
+# Views and likes of a frame as uint32 columns
+def _counts(df):
+    counts = df[["views", "likes"]].to_numpy()
+    if counts.min() < 0 or counts.max() > np.iinfo(np.uint32).max:
+        raise ValueError("views and likes must fit in uint32")
+    return counts[:, 0].astype(np.uint32), counts[:, 1].astype(np.uint32)
+
+
+# Compact columnar talks table: dictionary-encoded authors, uint32 counts and
+# an integer period code (year * 12 + month - 1) instead of datetime64.
+# Callbacks select rows by position arrays instead of copying frames.
+class TalksTable:
+    def __init__(self, title, link, author, names, period, views, likes):
+        self.title = title
+        self.link = link
+        self.author = author
+        self.names = names
+        self.period = period
+        self.views = views
+        self.likes = likes
+
+    @classmethod
+    def from_frame(cls, df):
+        authors = df["author"].astype("category")
+        views, likes = _counts(df)
+        return cls(
+            title=StringStore.from_strings(df["title"]),
+            link=StringStore.from_strings(df["link"]),
+            author=authors.cat.codes.to_numpy(dtype=np.int32),
+            names=authors.cat.categories,
+            period=period_codes(df["date"]),
+            views=views,
+            likes=likes,
+        )
+
+    # A new table with the rows of `df` appended. Authors not seen before get
+    # the next codes, so existing codes stay valid.
+    def extend(self, df):
+        names = self.names.append(
+            pd.Index(df["author"].unique()).difference(self.names)
+        )
+        views, likes = _counts(df)
+        return TalksTable(
+            title=self.title.extend(df["title"]),
+            link=self.link.extend(df["link"]),
+            author=np.concatenate(
+                (self.author, names.get_indexer(df["author"]).astype(np.int32))
+            ),
+            names=names,
+            period=np.concatenate((self.period, period_codes(df["date"]))),
+            views=np.concatenate((self.views, views)),
+            likes=np.concatenate((self.likes, likes)),
+        )
+
+    def __len__(self):
+        return len(self.period)
+
+    @property
+    def years(self):
+        return self.period // 12
+
+    # "%b, %Y" labels of the given rows
+    def dates(self, rows):
+        return period_labels(self.period[rows])
+
+    @property
+    def nbytes(self):
+        return (
+            self.title.nbytes
+            + self.link.nbytes
+            + self.author.nbytes
+            + sum(len(name.encode()) for name in self.names)
+            + self.period.nbytes
+            + self.views.nbytes
+            + self.likes.nbytes
+        )
+
+
+# Per-(year, month) talk counts and view sums, built once at load time.
+# Rows are indexed by the integer period code relative to January of year_min
+# so that any slider range is answered by slicing and reducing small arrays.
+class PeriodCube:
+    def __init__(self, period, views):
+        self.size = len(period)
+        self.year_min = int(period.min()) // 12
+        self.year_max = int(period.max()) // 12
+        n_years = self.year_max - self.year_min + 1
+
+        codes = period - self.year_min * 12
+        self.counts = np.bincount(codes, minlength=n_years * 12).reshape(n_years, 12)
+        self.views = np.zeros(n_years * 12, dtype=np.int64)
+        np.add.at(self.views, codes, views.astype(np.int64))
+        self.views = self.views.reshape(n_years, 12)
+
+    # A new cube with the rows appended to the columns since it was built
+    # added in, growing the year range if they fall outside it
+    def extend(self, period, views):
+        period, views = period[self.size :], views[self.size :].astype(np.int64)
+        cube = copy.copy(self)
+        cube.size += len(period)
+        cube.year_min = min(self.year_min, int(period.min()) // 12)
+        cube.year_max = max(self.year_max, int(period.max()) // 12)
+
+        pad = ((self.year_min - cube.year_min, cube.year_max - self.year_max), (0, 0))
+        cube.counts = np.pad(self.counts, pad)
+        cube.views = np.pad(self.views, pad)
+        codes = period - cube.year_min * 12
+        np.add.at(cube.counts.reshape(-1), codes, 1)
+        np.add.at(cube.views.reshape(-1), codes, views)
+        return cube
+
+    # Talk counts and average views per calendar month within the year range
+    def by_month(self, year):
+        rows = year_slice(year, self.year_min, self.year_max)
+        counts = self.counts[rows].sum(axis=0)
+        views = self.views[rows].sum(axis=0)
+        months = np.flatnonzero(counts)
+        return months + 1, counts[months], views[months] / counts[months]
+
+    # Talk counts and total views per year within the year range
+    def by_year(self, year):
+        rows = year_slice(year, self.year_min, self.year_max)
+        counts = self.counts[rows].sum(axis=1)
+        views = self.views[rows].sum(axis=1)
+        years = np.flatnonzero(counts)
+        return years + rows.start + self.year_min, counts[years], views[years]
+
+    # Monthly counts and views of the year range, preceded by up to `before`
+    # earlier months: (period code of the first month, counts, views)
+    def months(self, year, before=0):
+        rows = year_slice(year, self.year_min, self.year_max)
+        start = max(rows.start * 12 - before, 0)
+        months = slice(start, rows.stop * 12)
+        return (
+            self.year_min * 12 + start,
+            self.counts.reshape(-1)[months],
+            self.views.reshape(-1)[months],
+        )
+
+
+# Chronological series over a run of monthly counts and views starting at
+# period `start`. Each returns (period codes, counts, views), trimmed to the
+# first and last period with talks.
+def _trim(periods, counts, views, talks=None):
+    filled = np.flatnonzero(counts if talks is None else talks)
+    if not len(filled):
+        return periods[:0], counts[:0], views[:0]
+    keep = slice(filled[0], filled[-1] + 1)
+    return periods[keep], counts[keep], views[keep]
+
+
+# Sums over periods of `size` months (3 for quarters), each keyed by its first
+# month. The run starts at a year boundary and covers whole years.
+def period_sums(start, counts, views, size=1):
+    counts = counts.reshape(-1, size).sum(axis=1)
+    views = views.reshape(-1, size).sum(axis=1)
+    return _trim(start + size * np.arange(len(counts)), counts, views)
+
+
+# Means over the `window` months up to each month from period `first` on,
+# taken from differences of running totals. Months before the run count as
+# months without talks.
+def rolling_means(start, counts, views, window, first):
+    keep = slice(max(first - start, 0), None)
+    talks = counts[keep]
+    ends = np.arange(1, len(counts) + 1)
+    begins = np.maximum(ends - window, 0)
+    counts = np.concatenate(([0], np.cumsum(counts)))
+    views = np.concatenate(([0], np.cumsum(views)))
+    return _trim(
+        (start + ends - 1)[keep],
+        ((counts[ends] - counts[begins]) / window)[keep],
+        ((views[ends] - views[begins]) / window)[keep],
+        talks,
+    )
+
+
+# Running totals
+def cumulative_sums(start, counts, views):
+    periods, counts, views = _trim(start + np.arange(len(counts)), counts, views)
+    return periods, np.cumsum(counts), np.cumsum(views)
+
+
+# Row positions partitioned by year, each partition pre-sorted by views
+# (descending). The top N talks of a year range are found among the first N
+# rows of every selected partition, so no query scans or sorts the table.
+class TopKIndex:
+    def __init__(self, period, views):
+        years = period // 12
+        views = views.astype(np.int64)
+        self.year_min = int(years.min())
+        self.year_max = int(years.max())
+
+        self.rows = np.lexsort((-views, years))
+        self.views = views[self.rows]
+        self.offsets = np.searchsorted(
+            years[self.rows], np.arange(self.year_min, self.year_max + 2)
+        )
+
+    # A new index with the rows appended to the columns since it was built
+    # merged into their year partitions. Appended rows sort after existing
+    # rows with the same views, as if the index had been built from scratch.
+    def extend(self, period, views):
+        rows = np.arange(len(self.rows), len(period))
+        years, views = period[rows] // 12, views[rows].astype(np.int64)
+        index = copy.copy(self)
+        index.year_min = min(self.year_min, int(years.min()))
+        index.year_max = max(self.year_max, int(years.max()))
+
+        offsets = np.concatenate(
+            (
+                np.zeros(self.year_min - index.year_min, dtype=np.int64),
+                self.offsets,
+                np.full(index.year_max - self.year_max, self.offsets[-1]),
+            )
+        )
+        partitions = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        keys = _group_views_key(years - index.year_min, views)
+        order = np.argsort(keys, kind="stable")
+        positions = np.searchsorted(
+            _group_views_key(partitions, self.views), keys[order], side="right"
+        )
+        index.rows = np.insert(self.rows, positions, rows[order])
+        index.views = np.insert(self.views, positions, views[order])
+        index.offsets = offsets + np.searchsorted(
+            np.sort(years - index.year_min), np.arange(len(offsets))
+        )
+        return index
+
+    # Positions of every row within the year range, by year and then views
+    def rows_in(self, year=None):
+        if year is None:
+            year = (self.year_min, self.year_max)
+        years = year_slice(year, self.year_min, self.year_max)
+        return self.rows[self.offsets[years.start] : self.offsets[years.stop]]
+
+    # Positions of the `num` most viewed rows within the year range, most
+    # viewed first
+    def top(self, num, year=None):
+        if year is None:
+            year = (self.year_min, self.year_max)
+        years = year_slice(year, self.year_min, self.year_max)
+        parts = [
+            np.arange(self.offsets[i], min(self.offsets[i] + num, self.offsets[i + 1]))
+            for i in range(years.start, years.stop)
+        ]
+        if not parts:
+            return self.rows[:0]
+
+        # Most viewed first, tied views in row order, like the ranking of
+        # TalkSearch and of the SQLite backend
+        candidates = np.concatenate(parts)
+        rows = self.rows[candidates]
+        return rows[np.lexsort((rows, -self.views[candidates]))[:num]]
+
+
+# Persistent per-author statistics keyed by categorical author codes. Besides
+# whole-catalogue totals, partial aggregates are kept per (author, year) pair
+# under the sorted key author * n_years + year offset, so totals for any year
+# range are differences of prefix sums found by binary search.
+class AuthorStats:
+    def __init__(self, codes, names, period, views, likes):
+        self.names = names
+        self.codes = codes
+        years = period // 12
+        views = views.astype(np.int64)
+        likes = likes.astype(np.int64)
+        self.year_min = int(years.min())
+        self.n_years = int(years.max()) - self.year_min + 1
+        n_authors = len(self.names)
+
+        self.count = np.bincount(self.codes, minlength=n_authors)
+        self.views = np.zeros(n_authors, dtype=np.int64)
+        np.add.at(self.views, self.codes, views)
+        self.likes = np.zeros(n_authors, dtype=np.int64)
+        np.add.at(self.likes, self.codes, likes)
+
+        # Row positions grouped by author, each group sorted by views (descending)
+        self.rows = np.lexsort((-views, self.codes))
+        self.offsets = np.concatenate(([0], np.cumsum(self.count)))
+
+        keys = self.codes.astype(np.int64) * self.n_years + years - self.year_min
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.count_prefix = np.concatenate(
+            ([0], np.cumsum(np.bincount(inverse, minlength=len(self.keys))))
+        )
+        pair_views = np.zeros(len(self.keys), dtype=np.int64)
+        np.add.at(pair_views, inverse, views)
+        self.views_prefix = np.concatenate(([0], np.cumsum(pair_views)))
+        pair_likes = np.zeros(len(self.keys), dtype=np.int64)
+        np.add.at(pair_likes, inverse, likes)
+        self.likes_prefix = np.concatenate(([0], np.cumsum(pair_likes)))
+
+    # New statistics with the rows appended to the columns since these were
+    # built added in. Totals and per-author row groups are updated in place
+    # of a rebuild; the per-(author, year) aggregates are merged by key.
+    def extend(self, codes, names, period, views, likes):
+        rows = np.arange(len(self.codes), len(codes))
+        new_codes = codes[rows]
+        years = period[rows] // 12
+        views = views.astype(np.int64)
+        new_views, new_likes = views[rows], likes[rows].astype(np.int64)
+        stats = copy.copy(self)
+        stats.names = names
+        stats.codes = codes
+        stats.year_min = min(self.year_min, int(years.min()))
+        year_max = max(self.year_min + self.n_years - 1, int(years.max()))
+        stats.n_years = year_max - stats.year_min + 1
+
+        grow = (0, len(names) - len(self.names))
+        stats.count = np.pad(self.count, grow)
+        np.add.at(stats.count, new_codes, 1)
+        stats.views = np.pad(self.views, grow)
+        np.add.at(stats.views, new_codes, new_views)
+        stats.likes = np.pad(self.likes, grow)
+        np.add.at(stats.likes, new_codes, new_likes)
+
+        keys = _group_views_key(new_codes, new_views)
+        order = np.argsort(keys, kind="stable")
+        positions = np.searchsorted(
+            _group_views_key(codes[self.rows], views[self.rows]),
+            keys[order],
+            side="right",
+        )
+        stats.rows = np.insert(self.rows, positions, rows[order])
+        stats.offsets = np.concatenate(([0], np.cumsum(stats.count)))
+
+        # Re-key the existing pairs for the wider year range, then add the
+        # appended rows' sums to their pairs
+        old_keys = (self.keys // self.n_years) * stats.n_years + (
+            self.keys % self.n_years + self.year_min - stats.year_min
+        )
+        new_keys, inverse = np.unique(
+            new_codes.astype(np.int64) * stats.n_years + years - stats.year_min,
+            return_inverse=True,
+        )
+        stats.keys = np.union1d(old_keys, new_keys)
+        old = np.searchsorted(stats.keys, old_keys)
+        new = np.searchsorted(stats.keys, new_keys)
+        for name, values in [
+            ("count", np.ones(len(rows), dtype=np.int64)),
+            ("views", new_views),
+            ("likes", new_likes),
+        ]:
+            pairs = np.zeros(len(stats.keys), dtype=np.int64)
+            pairs[old] = np.diff(getattr(self, f"{name}_prefix"))
+            np.add.at(pairs, new[inverse], values)
+            setattr(stats, f"{name}_prefix", np.concatenate(([0], np.cumsum(pairs))))
+        return stats
+
+    def _bounds(self, codes, year):
+        codes = np.asarray(codes, dtype=np.int64) * self.n_years
+        first = min(max(year[0] - self.year_min, 0), self.n_years)
+        last = min(max(year[1] - self.year_min + 1, first), self.n_years)
+        return (
+            np.searchsorted(self.keys, codes + first),
+            np.searchsorted(self.keys, codes + last),
+        )
+
+    # Talk counts of the given authors within the year range
+    def count_in(self, codes, year):
+        lo, hi = self._bounds(codes, year)
+        return self.count_prefix[hi] - self.count_prefix[lo]
+
+    # Total views of the given authors within the year range
+    def views_in(self, codes, year):
+        lo, hi = self._bounds(codes, year)
+        return self.views_prefix[hi] - self.views_prefix[lo]
+
+    # Total likes of the given authors within the year range
+    def likes_in(self, codes, year):
+        lo, hi = self._bounds(codes, year)
+        return self.likes_prefix[hi] - self.likes_prefix[lo]
+
+    # Codes of the `num` authors with the most views of talks within the year
+    # range, tied views in code order, and their talk counts, views and likes
+    # there. Authors without talks in the range are left out.
+    def top_in(self, num, year):
+        last_year = self.year_min + self.n_years - 1
+        if year[0] <= self.year_min and year[1] >= last_year:
+            count, views, likes = self.count, self.views, self.likes
+        else:
+            lo, hi = self._bounds(np.arange(len(self.names)), year)
+            count = self.count_prefix[hi] - self.count_prefix[lo]
+            views = self.views_prefix[hi] - self.views_prefix[lo]
+            likes = self.likes_prefix[hi] - self.likes_prefix[lo]
+
+        codes = np.flatnonzero(count)
+        if 0 < num < len(codes):
+            # Every author with at least the views of the num-th
+            cutoff = np.partition(views[codes], len(codes) - num)[len(codes) - num]
+            codes = codes[views[codes] >= cutoff]
+        codes = codes[np.lexsort((codes, -views[codes]))][:num]
+        return codes, count[codes], views[codes], likes[codes]
+
+    # Positions of the author's `num` most viewed rows, most viewed first
+    def rows_of(self, name, num):
+        if name not in self.names:
+            return self.rows[:0]
+        code = self.names.get_loc(name)
+        start = self.offsets[code]
+        return self.rows[start : min(start + num, self.offsets[code + 1])]
+
+    # Name of the author with the most talks
+    def most_prolific(self):
+        return self.names[np.argmax(self.count)]
+
+
+# Per-year like-rate sketches and views/likes density grids. Both are bin
+# counts, so a year range merges by summing its years, and percentiles are
+# read from the merged sketch instead of sorting rows.
+class EngagementStats:
+    def __init__(self, year_min, rates, density, size=0):
+        self.year_min = year_min
+        self.rates = rates
+        self.density = density
+        self.size = size
+
+    @classmethod
+    def from_rows(cls, period, views, likes):
+        years = period // 12
+        year_min = int(years.min())
+        n_years = int(years.max()) - year_min + 1
+        rates, density = _engagement_bins(years - year_min, views, likes, n_years)
+        return cls(year_min, rates, density, len(period))
+
+    @property
+    def year_max(self):
+        return self.year_min + len(self.rates) - 1
+
+    # New statistics with the rows appended to the columns since these were
+    # built added in
+    def extend(self, period, views, likes):
+        years = period[self.size :] // 12
+        year_min = min(self.year_min, int(years.min()))
+        n_years = max(self.year_max, int(years.max())) - year_min + 1
+        before = self.year_min - year_min
+        after = n_years - before - len(self.rates)
+        rates, density = _engagement_bins(
+            years - year_min, views[self.size :], likes[self.size :], n_years
+        )
+        return EngagementStats(
+            year_min,
+            rates + np.pad(self.rates, ((before, after), (0, 0))),
+            density + np.pad(self.density, ((before, after), (0, 0), (0, 0))),
+            len(period),
+        )
+
+    # Like-rate histogram of the year range, trimmed to the non-empty sketch
+    # bins: (edges, counts)
+    def rate_histogram(self, year):
+        rows = year_slice(year, self.year_min, self.year_max)
+        counts = self.rates[rows].sum(axis=0)
+        filled = np.flatnonzero(counts)
+        if not len(filled):
+            return rate_edges([]), counts[:0]
+        first, last = filled[0], filled[-1] + 1
+        return rate_edges(np.arange(first, last + 1)), counts[first:last]
+
+    # Like-rate quantiles of every year in the range that has talks:
+    # (years, values) with a row of values per year
+    def rate_percentiles(self, year, quantiles):
+        rows = year_slice(year, self.year_min, self.year_max)
+        rates = self.rates[rows]
+        years = np.flatnonzero(rates.sum(axis=1))
+        values = [_sketch_quantiles(counts, quantiles) for counts in rates[years]]
+        return (
+            years + rows.start + self.year_min,
+            np.reshape(values, (len(years), len(quantiles))),
+        )
+
+    # Talk counts of the year range on a log10 views x likes grid, trimmed to
+    # the non-empty cells: (views centers, likes centers, counts[likes, views])
+    def density_grid(self, year):
+        rows = year_slice(year, self.year_min, self.year_max)
+        grid = self.density[rows].sum(axis=0)
+        views = np.flatnonzero(grid.sum(axis=1))
+        likes = np.flatnonzero(grid.sum(axis=0))
+        if not len(views):
+            return np.zeros(0), np.zeros(0), np.zeros((0, 0), dtype=np.int64)
+
+        views = slice(views[0], views[-1] + 1)
+        likes = slice(likes[0], likes[-1] + 1)
+        centers = 10 ** ((np.arange(COUNT_BINS) + 0.5) * COUNT_STEP)
+        return centers[views], centers[likes], grid[views, likes].T
+
+
+# Like-rate sketches and density grids of rows at the given year offsets
+def _engagement_bins(offsets, views, likes, n_years):
+    offsets = offsets.astype(np.int64)
+    rates = np.bincount(
+        offsets * RATE_BINS + rate_bins(views, likes), minlength=n_years * RATE_BINS
+    )
+    cells = (offsets * COUNT_BINS + count_bins(views)) * COUNT_BINS + count_bins(likes)
+    density = np.bincount(cells, minlength=n_years * COUNT_BINS**2)
+    return (
+        rates.reshape(n_years, RATE_BINS),
+        density.reshape(n_years, COUNT_BINS, COUNT_BINS),
+    )
+
+
+# Quantiles of a like-rate sketch, each the harmonic midpoint of its bin
+def _sketch_quantiles(counts, quantiles):
+    cumulative = np.cumsum(counts)
+    bins = np.searchsorted(
+        cumulative, np.asarray(quantiles) * (cumulative[-1] - 1), side="right"
+    )
+    lower, upper = rate_edges(bins), rate_edges(bins + 1)
+    return 2 * lower * upper / (lower + upper)
+
+
+# In-memory data backend: the talks table together with the indexes the
+# dashboard queries. Every backend (see database.py for the SQLite one)
+# provides year_min, year_max, author_search, engagement and the query
+# methods below.
+# Talks are returned as dicts of column arrays, most viewed first, keyed by
+# stable integer talk and author ids.
+class Talks:
+    def __init__(self, table):
+        self.table = table
+        self.year_min = int(table.period.min()) // 12
+        self.year_max = int(table.period.max()) // 12
+        self.period_cube = PeriodCube(table.period, table.views)
+        self.engagement = EngagementStats.from_rows(
+            table.period, table.views, table.likes
+        )
+        self.top_talks = TopKIndex(table.period, table.views)
+        self.author_stats = AuthorStats(
+            table.author, table.names, table.period, table.views, table.likes
+        )
+        self.author_search = AuthorSearch(
+            self.author_stats.names, self.author_stats.count
+        )
+        links = table.link[:]
+        self.link_hashes = np.sort(pd.util.hash_array(links))
+        self.talk_search = TalkSearch(table.title[:], links, table.views, table.years)
+
+    # The talks of a cleaned frame whose links are not in the table yet
+    def unseen(self, df):
+        hashes = pd.util.hash_array(df["link"].to_numpy(dtype=object))
+        return df[~np.isin(hashes, self.link_hashes)]
+
+    # A new backend with the talks of `df` (a cleaned frame) folded into the
+    # table and every index, without rebuilding them from the whole table
+    def extend(self, df):
+        table = self.table.extend(df)
+        rows = slice(len(self.table), len(table))
+        talks = copy.copy(self)
+        talks.table = table
+        talks.year_min = min(self.year_min, int(table.period[rows].min()) // 12)
+        talks.year_max = max(self.year_max, int(table.period[rows].max()) // 12)
+        talks.period_cube = self.period_cube.extend(table.period, table.views)
+        talks.engagement = self.engagement.extend(
+            table.period, table.views, table.likes
+        )
+        talks.top_talks = self.top_talks.extend(table.period, table.views)
+        talks.author_stats = self.author_stats.extend(
+            table.author, table.names, table.period, table.views, table.likes
+        )
+        talks.author_search = self.author_search.extend(
+            table.names, talks.author_stats.count
+        )
+        talks.link_hashes = np.union1d(
+            self.link_hashes, pd.util.hash_array(table.link[rows])
+        )
+        talks.talk_search = self.talk_search.extend(
+            table.title[rows], table.link[rows], table.views[rows], table.years[rows]
+        )
+        return talks
+
+    # Display columns (id, title, link, author_id, author, date, period,
+    # views, likes) of the rows. Talk ids are table rows.
+    def columns(self, rows):
+        return dict(
+            id=np.asarray(rows, dtype=np.int64),
+            title=self.table.title[rows],
+            link=self.table.link[rows],
+            author_id=self.table.author[rows],
+            author=np.asarray(self.author_stats.names)[self.table.author[rows]],
+            date=self.table.dates(rows),
+            period=self.table.period[rows],
+            views=self.table.views[rows],
+            likes=self.table.likes[rows],
+        )
+
+    # The `num` most viewed talks within the year range
+    def top(self, num, year=None):
+        return self.columns(self.top_talks.top(num, year))
+
+    # The author's `num` most viewed talks
+    def talks_by(self, author, num):
+        return self.columns(self.author_stats.rows_of(author, num))
+
+    # The `num` most viewed talks matching the query
+    def search(self, query, num, year=None):
+        return self.columns(self.talk_search.search(query, num, year))
+
+    # Every talk of an author, matching a query or within the year range, as
+    # column chunks of up to `chunk_size` rows
+    def export(self, chunk_size, year=None, author=None, query=None):
+        if author is not None:
+            rows = self.author_stats.rows_of(author, len(self.table))
+        elif query_terms(query or ""):
+            rows = self.talk_search.search(query, len(self.table), year)
+        else:
+            rows = self.top_talks.rows_in(year)
+        for start in range(0, len(rows), chunk_size):
+            yield self.columns(rows[start : start + chunk_size])
+
+    # The `num` authors with the most views of talks within the year range:
+    # their ids, names, talk counts, views and likes there
+    def top_speakers(self, num, year):
+        codes, count, views, likes = self.author_stats.top_in(num, year)
+        return dict(
+            author_id=codes,
+            author=np.asarray(self.author_stats.names)[codes],
+            count=count,
+            views=views,
+            likes=likes,
+        )
+
+    def most_prolific(self):
+        return self.author_stats.most_prolific()
+
+    def by_month(self, year):
+        return self.period_cube.by_month(year)
+
+    def by_year(self, year):
+        return self.period_cube.by_year(year)
+
+    # Talk counts and total views per quarter within the year range
+    def by_quarter(self, year):
+        return period_sums(*self.period_cube.months(year), size=3)
+
+    # Talk counts and total views per month within the year range, in order
+    def by_year_month(self, year):
+        return period_sums(*self.period_cube.months(year))
+
+    # Talk counts and views per month averaged over the `window` months up to
+    # each month of the year range
+    def rolling(self, year, window):
+        start, counts, views = self.period_cube.months(year, window - 1)
+        first = max(year[0], self.year_min) * 12
+        return rolling_means(start, counts, views, window, first)
+
+    # Running totals of talks and views per month within the year range
+    def cumulative(self, year):
+        return cumulative_sums(*self.period_cube.months(year))
@@ -0,0 +1,23 @@
+# Production entry point. From the repository root run e.g.
+#   gunicorn --pythonpath scripts --preload --workers 4 wsgi:server
+# The numeric columns are memory-mapped read-only from the dataset snapshot,
+# so all workers share one copy of them. Set TED_TALKS_DATA to serve another
+# CSV file, or a SQLite database built by database.py.
+# Set TED_TALKS_WATCH to the CSV file, or to a drop directory, to ingest new
+# talks while serving. Each worker then follows the data itself, so run
+# without --preload: the watching thread would not survive the fork.
+# Downloads from /export stream for as long as the client takes to read them;
+# add --threads so that one does not hold up a whole worker. Callback outputs
+# are then rendered on a pool of four threads per worker (see executor.py)
+# that runs identical concurrent renders once.
+
+import os
+
+from app import DATA_PATH, create_app
+
+app = create_app(
+    os.environ.get("TED_TALKS_DATA", DATA_PATH),
+    mmap_mode="r",
+    watch=os.environ.get("TED_TALKS_WATCH"),
+)
+server = app.server
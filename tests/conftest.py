@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# The scripts import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from store import Talks, TalksTable  # noqa: E402
+
+YEAR_MIN, YEAR_MAX = 2001, 2022
+
+
+# Talks with distinct views, so every top N is unique
+def talks_frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        dict(
+            date=pd.to_datetime(
+                dict(
+                    year=rng.integers(YEAR_MIN, YEAR_MAX + 1, rows),
+                    month=rng.integers(1, 13, rows),
+                    day=1,
+                )
+            ),
+            views=rng.permutation(rows) * 7 + 1000,
+        )
+    )
+
+
+# Talks of a few hundred authors, with titles and links to search
+def catalogue(rows, seed):
+    rng = np.random.default_rng(seed)
+    df = talks_frame(rows, seed)
+    words = np.array("why how future climate brain data city ocean music".split())
+    df["title"] = [" ".join(rng.choice(words, 3)) + f" {row}" for row in range(rows)]
+    df["link"] = [f"https://ted.com/talks/talk_{seed}_{row}" for row in range(rows)]
+    df["author"] = [f"Speaker {code}" for code in rng.integers(0, rows // 5, rows)]
+    df["likes"] = df["views"] // int(rng.integers(20, 50))
+    return df
+
+
+# A backend built on the first `head` rows and extended with the rest in
+# batches, next to one built on every row
+def extended_and_full(df, head, batches=3):
+    talks = Talks(TalksTable.from_frame(df[:head]))
+    for rows in np.array_split(np.arange(head, len(df)), batches):
+        talks = talks.extend(df.iloc[rows])
+    return talks, Talks(TalksTable.from_frame(df))
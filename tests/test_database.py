@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from conftest import YEAR_MAX, YEAR_MIN, catalogue
+from database import SQLiteTalks, import_csv
+from export import MONTH_NAMES
+from snapshot import parse_csv
+from store import Talks, TalksTable
+
+# Talk ids differ: table rows in memory, view ranks in SQLite
+COLUMNS = ["title", "link", "author_id", "author", "date", "period", "views", "likes"]
+RANGES = [
+    [YEAR_MIN, YEAR_MAX],
+    [2005, 2009],
+    [2010, 2010],
+    [YEAR_MIN - 5, 2003],
+    [YEAR_MAX + 1, YEAR_MAX + 4],
+]
+
+
+# Both backends over one CSV file of talks, whose views are rounded so that
+# many of them tie, as in the shipped dataset
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("data")
+    df = catalogue(3000, 0)
+    df["views"] = df["views"] // 2000 * 1000
+    df["date"] = (
+        MONTH_NAMES[df["date"].dt.month - 1] + " " + df["date"].dt.year.astype(str)
+    )
+    df.to_csv(directory / "talks.csv", index=False)
+    import_csv(directory / "talks.csv", directory / "talks.db", chunk_size=1000)
+    return (
+        Talks(TalksTable.from_frame(parse_csv(directory / "talks.csv"))),
+        SQLiteTalks(directory / "talks.db"),
+    )
+
+
+def assert_same_talks(a, b):
+    for column in COLUMNS:
+        np.testing.assert_array_equal(a[column], b[column], err_msg=column)
+
+
+# Export chunks joined into one set of columns
+def exported(backend, **selection):
+    chunks = list(backend.export(700, **selection))
+    return {
+        column: np.concatenate([chunk[column] for chunk in chunks] or [[]])
+        for column in COLUMNS
+    }
+
+
+def test_top(backends):
+    memory, sqlite = backends
+    for year in RANGES + [None]:
+        for num in [1, 10, 50, 5000]:
+            assert_same_talks(memory.top(num, year), sqlite.top(num, year))
+
+
+def test_search(backends):
+    memory, sqlite = backends
+    for query in ["city", "ci", "why how", "brain data c", "talk_0_12", "nothing"]:
+        for year in RANGES[:3] + [None]:
+            assert_same_talks(
+                memory.search(query, 20, year), sqlite.search(query, 20, year)
+            )
+
+
+def test_talks_by(backends):
+    memory, sqlite = backends
+    for author in [memory.most_prolific(), "Speaker 7", "Speaker 123", "Nobody"]:
+        assert_same_talks(memory.talks_by(author, 10), sqlite.talks_by(author, 10))
+    assert memory.most_prolific() == sqlite.most_prolific()
+
+
+def test_top_speakers(backends):
+    memory, sqlite = backends
+    for year in RANGES + [[1990, 2030]]:
+        for num in [1, 10, 1000]:
+            a, b = memory.top_speakers(num, year), sqlite.top_speakers(num, year)
+            for column in ["author_id", "author", "count", "views", "likes"]:
+                np.testing.assert_array_equal(a[column], b[column], err_msg=column)
+
+
+@pytest.mark.parametrize(
+    "series", ["by_month", "by_year", "by_quarter", "by_year_month", "cumulative"]
+)
+def test_period_series(backends, series):
+    memory, sqlite = backends
+    for year in RANGES:
+        for a, b in zip(getattr(memory, series)(year), getattr(sqlite, series)(year)):
+            np.testing.assert_allclose(a, b)
+
+
+@pytest.mark.parametrize("window", [3, 12])
+def test_rolling(backends, window):
+    memory, sqlite = backends
+    for year in RANGES:
+        for a, b in zip(memory.rolling(year, window), sqlite.rolling(year, window)):
+            np.testing.assert_allclose(a, b)
+
+
+@pytest.mark.parametrize(
+    "selection",
+    [
+        dict(),
+        dict(year=[2005, 2009]),
+        dict(year=[YEAR_MAX + 1, YEAR_MAX + 4]),
+        dict(author="Speaker 7"),
+        dict(query="city"),
+        dict(query="why how", year=[2010, 2015]),
+    ],
+)
+def test_export(backends, selection):
+    memory, sqlite = backends
+    assert_same_talks(exported(memory, **selection), exported(sqlite, **selection))
@@ -0,0 +1,45 @@
+import io
+
+import pandas as pd
+import pytest
+
+from flask import Flask
+
+import export
+from store import Talks, TalksTable
+from conftest import YEAR_MAX, YEAR_MIN, catalogue
+
+
+@pytest.fixture
+def client():
+    server = Flask(__name__)
+    talks = Talks(TalksTable.from_frame(catalogue(500, 0)))
+    export.init_app(server, lambda: talks)
+    return server.test_client()
+
+
+def test_export_of_a_year_range(client):
+    response = client.get(f"/export?format=csv&year={YEAR_MIN}&year={YEAR_MIN + 4}")
+    assert response.status_code == 200
+    df = pd.read_csv(io.BytesIO(response.data))
+    years = pd.to_datetime(df["date"], format="%B %Y").dt.year
+    assert len(df) and years.between(YEAR_MIN, YEAR_MIN + 4).all()
+
+
+@pytest.mark.parametrize("year", [(YEAR_MIN - 9, YEAR_MIN - 1), (2030, 2031)])
+def test_export_of_a_range_outside_the_data(client, year):
+    for file_format in export.FORMATS:
+        response = client.get(
+            f"/export?format={file_format}&year={year[0]}&year={year[1]}"
+        )
+        assert response.status_code == 200
+        if file_format == "csv":
+            assert response.data.decode().split() == [",".join(export.SCHEMA.names)]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["format=xml", "year=2010", "year=2010&year=x", f"year={YEAR_MAX}&year={YEAR_MIN}"],
+)
+def test_export_rejects_bad_parameters(client, query):
+    assert client.get(f"/export?{query}").status_code == 400
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from conftest import catalogue, extended_and_full
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_extended_talk_search_matches_rebuild(seed):
+    df = catalogue(3000, seed)
+    # Appended talks bring words the index has not seen
+    df.loc[2990:, "title"] = "quantum " + df.loc[2990:, "title"]
+    extended, full = extended_and_full(df, 2000)
+
+    rng = np.random.default_rng(seed)
+    queries = ["quantum", "qua", "talk", "city music", "why how f", "brain 12"]
+    queries += [" ".join(rng.choice(df["title"][0].split(), 2)) for _ in range(10)]
+    for query in queries:
+        for year in [None, [2005, 2010], [2022, 2022]]:
+            np.testing.assert_array_equal(
+                extended.talk_search.search(query, 25, year),
+                full.talk_search.search(query, 25, year),
+            )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_extended_author_search_matches_rebuild(seed):
+    df = catalogue(3000, seed)
+    df.loc[2950:, "author"] = [f"Newcomer {row % 7}" for row in range(2950, 3000)]
+    extended, full = extended_and_full(df, 2000)
+
+    # Codes differ between the two, and so may the order of authors with
+    # equal talk counts: compare every match, and the counts of the top ones
+    a, b = extended.author_search, full.author_search
+    for query in ["", "speaker", "speaker 1", "newcomer", "new", "3", "nobody"]:
+        assert sorted(a.names[a.search(query, 10**6)]) == sorted(
+            b.names[b.search(query, 10**6)]
+        )
+        np.testing.assert_array_equal(
+            a.counts[a.search(query)], b.counts[b.search(query)]
+        )
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import YEAR_MAX, YEAR_MIN, catalogue, extended_and_full, talks_frame
+from store import Talks, TalksTable, TopKIndex, period_codes
+
+
+# The `num` most viewed rows within the year range, as the dashboard used to
+# select them
+def pandas_top(df, num, year):
+    years = df["date"].dt.year
+    selected = df[(years >= year[0]) & (years <= year[1])]
+    return selected.sort_values("views")[-num:].index.to_numpy()[::-1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_top_matches_pandas(seed):
+    df = talks_frame(2000, seed)
+    index = TopKIndex(period_codes(df["date"]), df["views"].to_numpy())
+    rng = np.random.default_rng(seed)
+
+    for _ in range(50):
+        first, last = np.sort(rng.integers(YEAR_MIN - 2, YEAR_MAX + 3, 2))
+        num = int(rng.choice([1, 5, 8, 100, 3000]))
+        expected = pandas_top(df, num, (first, last))
+        np.testing.assert_array_equal(index.top(num, [first, last]), expected)
+
+
+def test_top_without_range_covers_every_year():
+    df = talks_frame(500, 0)
+    index = TopKIndex(period_codes(df["date"]), df["views"].to_numpy())
+    expected = pandas_top(df, 20, (YEAR_MIN, YEAR_MAX))
+    np.testing.assert_array_equal(index.top(20), expected)
+
+
+def test_top_of_an_empty_range():
+    df = talks_frame(500, 0)
+    index = TopKIndex(period_codes(df["date"]), df["views"].to_numpy())
+    assert len(index.top(10, [YEAR_MAX + 1, YEAR_MAX + 5])) == 0
+    assert len(index.top(10, [YEAR_MAX, YEAR_MIN])) == 0
+
+
+def test_top_with_tied_views():
+    df = talks_frame(1000, 1)
+    df["views"] //= 500
+    index = TopKIndex(period_codes(df["date"]), df["views"].to_numpy())
+    rows = index.top(50, [2005, 2015])
+    expected = pandas_top(df, 50, (2005, 2015))
+    np.testing.assert_array_equal(
+        df["views"].to_numpy()[rows], df["views"].to_numpy()[expected]
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_extended_top_k_index_matches_rebuild(seed):
+    df = catalogue(3000, seed)
+    # Appended talks reach past both ends of the year range
+    df.loc[2500:2600, "date"] = pd.Timestamp(f"{YEAR_MIN - 3}-05-01")
+    df.loc[2700:2800, "date"] = pd.Timestamp(f"{YEAR_MAX + 2}-11-01")
+    extended, full = extended_and_full(df, 2000)
+
+    for name in ["year_min", "year_max"]:
+        assert getattr(extended.top_talks, name) == getattr(full.top_talks, name)
+    for name in ["rows", "views", "offsets"]:
+        np.testing.assert_array_equal(
+            getattr(extended.top_talks, name), getattr(full.top_talks, name)
+        )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_extended_author_stats_match_rebuild(seed):
+    df = catalogue(3000, seed)
+    df.loc[2900:, "date"] = pd.Timestamp(f"{YEAR_MAX + 1}-03-01")
+    df.loc[2950:, "author"] = [f"Newcomer {row % 7}" for row in range(2950, 3000)]
+    extended, full = extended_and_full(df, 2000)
+    a, b = extended.author_stats, full.author_stats
+
+    # Author codes differ: the extended table appends new names in order of
+    # appearance, so statistics are compared by name
+    names = np.asarray(b.names)
+    codes = a.names.get_indexer(names)
+    assert (codes >= 0).all() and len(a.names) == len(b.names)
+    for name in ["count", "views", "likes"]:
+        np.testing.assert_array_equal(getattr(a, name)[codes], getattr(b, name))
+
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        year = sorted(rng.integers(YEAR_MIN - 1, YEAR_MAX + 3, 2))
+        for name in ["count_in", "views_in", "likes_in"]:
+            np.testing.assert_array_equal(
+                getattr(a, name)(codes, year),
+                getattr(b, name)(np.arange(len(names)), year),
+            )
+    for name in rng.choice(names, 50):
+        np.testing.assert_array_equal(a.rows_of(name, 10), b.rows_of(name, 10))
+
+
+@pytest.mark.parametrize(
+    "year",
+    [[YEAR_MIN - 10, YEAR_MIN - 5], [YEAR_MAX + 5, YEAR_MAX + 10], [YEAR_MAX + 1] * 2],
+)
+def test_queries_of_a_range_outside_the_data(year):
+    talks = Talks(TalksTable.from_frame(catalogue(500, 0)))
+
+    assert len(talks.top(10, year)["id"]) == 0
+    assert sum(len(chunk["id"]) for chunk in talks.export(100, year=year)) == 0
+    assert len(talks.top_speakers(10, year)["author"]) == 0
+    for series in [
+        talks.by_month(year),
+        talks.by_year(year),
+        talks.by_quarter(year),
+        talks.by_year_month(year),
+        talks.rolling(year, 12),
+        talks.cumulative(year),
+    ]:
+        assert all(len(values) == 0 for values in series)
+    assert len(talks.engagement.rate_histogram(year)[1]) == 0
+    assert len(talks.engagement.rate_percentiles(year, [0.5])[0]) == 0
+    assert talks.engagement.density_grid(year)[2].size == 0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_top_speakers_match_pandas(seed):
+    df = catalogue(3000, seed)
+    df["views"] //= 3000
+    talks = Talks(TalksTable.from_frame(df))
+    rng = np.random.default_rng(seed)
+
+    for year in [[YEAR_MIN, YEAR_MAX], [2010, 2010], [2005, 2012], [1990, 2030]]:
+        num = int(rng.choice([1, 10, 100, 5000]))
+        years = df["date"].dt.year
+        selected = df[(years >= year[0]) & (years <= year[1])]
+        expected = (
+            selected.groupby("author")
+            .agg(
+                count=("views", "size"), views=("views", "sum"), likes=("likes", "sum")
+            )
+            .reset_index()
+            .sort_values(["views", "author"], ascending=[False, True])[:num]
+        )
+        top = talks.top_speakers(num, year)
+        for column in ["author", "count", "views", "likes"]:
+            np.testing.assert_array_equal(top[column], expected[column])